@@ -1,10 +1,10 @@
-import aiohttp
+from __future__ import annotations
 import time
-from typing import Optional, Dict, Any, Tuple, Coroutine, Union
-
-from Tools.scripts.generate_opcode_h import header
+from typing import Optional, Dict, Any, Tuple, Coroutine, Union, TYPE_CHECKING
 
 from api_client import APIClient
+if TYPE_CHECKING:
+    import aiohttp
 
 class AdminService(APIClient):
     """管理员服务类 - 负责管理员登录和测评发布"""
@@ -0,0 +1,439 @@
+import sys
+import json
+import math
+import argparse
+from array import array
+from collections import Counter
+from itertools import islice
+from typing import Dict, Any, List, Optional, Tuple, Iterator
+
+from metrics import LatencyHistogram
+
+try:
+    import numpy as np
+except ImportError:  # 没有安装numpy时使用纯Python分桶
+    np = None
+
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+def iter_chunks(path: str, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    分块读取JSONL记录文件，避免一次性加载全部数据
+
+    Args:
+        path: JSONL文件路径
+        chunk_size: 每块的行数
+
+    Yields:
+        List[Dict]: 一块已解析的记录
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            lines = list(islice(f, chunk_size))
+            if not lines:
+                return
+            rows = []
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    # 运行被中断时最后一行可能不完整
+                    continue
+            yield rows
+
+
+def record_many(hist: LatencyHistogram, values: array) -> None:
+    """
+    批量记录延迟样本，有numpy时向量化分桶
+
+    Args:
+        hist: 目标直方图
+        values: 延迟数组（毫秒）
+    """
+    if not values:
+        return
+    if np is None:
+        for value in values:
+            hist.record(value)
+        return
+
+    data = np.frombuffer(values, dtype=np.float64)
+    scaled = np.maximum(data / LatencyHistogram.MIN_MS, 1.0)
+    indices = np.floor(np.log(scaled) / math.log(LatencyHistogram.GROWTH)).astype(np.int64) + 1
+    indices[data <= LatencyHistogram.MIN_MS] = 0
+    np.minimum(indices, LatencyHistogram.BUCKET_COUNT - 1, out=indices)
+    counts = np.frombuffer(hist.counts, dtype=np.int64)
+    counts += np.bincount(indices, minlength=LatencyHistogram.BUCKET_COUNT)
+    hist.total += len(data)
+    hist.sum += float(data.sum())
+    hist.max = max(hist.max, float(data.max()))
+
+
+def corrected_values(values: array, expected_interval_ms: float) -> array:
+    """
+    生成修正协调遗漏后的样本：原始样本加上慢请求期间本应发出的请求的补录延迟，
+    与 LatencyHistogram.record_with_expected_interval 结果一致
+
+    Args:
+        values: 原始延迟数组（毫秒）
+        expected_interval_ms: 期望请求间隔（毫秒）
+
+    Returns:
+        array: 修正后的延迟数组
+    """
+    interval = expected_interval_ms
+    if np is None:
+        result = array('d', values)
+        for value in values:
+            missing = value - interval
+            while missing >= interval:
+                result.append(missing)
+                missing -= interval
+        return result
+
+    data = np.frombuffer(values, dtype=np.float64)
+    slow = data[data > interval]
+    repeats = (np.floor(slow / interval) - 1).astype(np.int64)
+    repeats[repeats < 0] = 0
+    total = int(repeats.sum())
+    if not total:
+        return array('d', values)
+    # 第 i 个补录样本为 value - i * interval
+    starts = np.repeat(np.cumsum(repeats) - repeats, repeats)
+    steps = np.arange(total, dtype=np.int64) - starts + 1
+    extra = np.repeat(slow, repeats) - steps * interval
+    return array('d', np.concatenate((data, extra)).tobytes())
+
+
+class WindowStats:
+    """单个时间窗口的统计"""
+
+    __slots__ = ('histogram', 'count', 'errors')
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.count = 0
+        self.errors = 0
+
+
+class RunAnalysis:
+    """
+    单次运行的流式分析结果
+
+    逐块消费记录，只保留每个端点和每个时间窗口的直方图与计数，内存占用与记录条数无关
+    """
+
+    def __init__(self, path: str, window: float = 10.0,
+                 expected_interval_ms: Optional[float] = None):
+        """
+        初始化分析器
+
+        Args:
+            path: JSONL记录文件路径
+            window: 时间序列窗口长度（秒）
+            expected_interval_ms: 期望请求间隔（毫秒），提供时额外计算修正协调遗漏后的分位数
+        """
+        self.path = path
+        self.window = window
+        self.expected_interval_ms = expected_interval_ms
+        self.endpoints: Dict[str, LatencyHistogram] = {}
+        self.corrected: Dict[str, LatencyHistogram] = {}
+        self.endpoint_errors: Counter = Counter()
+        self.windows: Dict[int, WindowStats] = {}
+        self.errors: Counter = Counter()   # (端点, 状态码, 错误信息) -> 次数
+        self.first_t: Optional[float] = None
+        self.last_t: Optional[float] = None
+        self.origin_t: Optional[float] = None   # 时间窗口的起点，取第一条记录的时间
+
+    def run(self, chunk_size: int = 50000) -> 'RunAnalysis':
+        """
+        流式读取并分析整个文件
+
+        Args:
+            chunk_size: 每块的行数
+
+        Returns:
+            RunAnalysis: 自身，便于链式调用
+        """
+        for rows in iter_chunks(self.path, chunk_size):
+            self.consume(rows)
+        return self
+
+    def consume(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        分析一块记录
+
+        Args:
+            rows: 已解析的记录列表
+        """
+        if not rows:
+            return
+        if self.first_t is None:
+            self.first_t = self.origin_t = rows[0]['t']
+
+        by_endpoint: Dict[str, array] = {}
+        by_window: Dict[int, array] = {}
+        window_errors: Counter = Counter()
+        origin_t = self.origin_t
+
+        for row in rows:
+            t = row['t']
+            ep = row['ep']
+            ms = row['ms']
+            if self.last_t is None or t > self.last_t:
+                self.last_t = t
+            if t < self.first_t:
+                self.first_t = t
+
+            values = by_endpoint.get(ep)
+            if values is None:
+                values = by_endpoint[ep] = array('d')
+            values.append(ms)
+
+            key = int((t - origin_t) // self.window)
+            values = by_window.get(key)
+            if values is None:
+                values = by_window[key] = array('d')
+            values.append(ms)
+
+            if not row['ok']:
+                self.endpoint_errors[ep] += 1
+                window_errors[key] += 1
+                self.errors[(ep, row['s'], row.get('msg', ''))] += 1
+
+        for ep, values in by_endpoint.items():
+            hist = self.endpoints.get(ep)
+            if hist is None:
+                hist = self.endpoints[ep] = LatencyHistogram()
+            record_many(hist, values)
+            if self.expected_interval_ms:
+                hist = self.corrected.get(ep)
+                if hist is None:
+                    hist = self.corrected[ep] = LatencyHistogram()
+                record_many(hist, corrected_values(values, self.expected_interval_ms))
+
+        for key, values in by_window.items():
+            stats = self.windows.get(key)
+            if stats is None:
+                stats = self.windows[key] = WindowStats()
+            record_many(stats.histogram, values)
+            stats.count += len(values)
+            stats.errors += window_errors[key]
+
+    @property
+    def duration(self) -> float:
+        """运行时长（秒）"""
+        if self.first_t is None or self.last_t is None:
+            return 0.0
+        return max(self.last_t - self.first_t, 1e-9)
+
+    def window_throughput(self, key: int) -> float:
+        """
+        时间窗口内的吞吐（请求/秒）
+
+        最后一个窗口通常只覆盖一部分时长，按实际覆盖的时长计算，而不是整个窗口
+
+        Args:
+            key: 窗口序号
+
+        Returns:
+            float: 吞吐
+        """
+        start = self.origin_t + key * self.window
+        span = min(self.window, self.last_t - start)
+        return self.windows[key].count / (span if span > 0 else self.window)
+
+    def endpoint_summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        每个端点的汇总统计
+
+        Returns:
+            Dict: 端点名 -> 统计字典
+        """
+        summary = {}
+        for ep, hist in self.endpoints.items():
+            stats = {
+                'count': hist.total,
+                'errors': self.endpoint_errors[ep],
+                'error_rate': self.endpoint_errors[ep] / hist.total if hist.total else 0.0,
+                'throughput': hist.total / self.duration if self.duration else 0.0,
+                'mean': hist.mean,
+                'max': hist.max,
+            }
+            for p in PERCENTILES:
+                stats[f'p{p:g}'] = hist.percentile(p)
+            corrected = self.corrected.get(ep)
+            if corrected is not None:
+                stats['p99_corrected'] = corrected.percentile(99)
+                stats['p99.9_corrected'] = corrected.percentile(99.9)
+            summary[ep] = stats
+        return summary
+
+
+def diff_runs(baseline: RunAnalysis, current: RunAnalysis, threshold: float,
+              error_threshold: float) -> List[Tuple[str, str, float, float]]:
+    """
+    对比两次运行，找出超过阈值的退化
+
+    Args:
+        baseline: 基线运行
+        current: 当前运行
+        threshold: 延迟上升或吞吐下降的相对阈值（0.1表示10%）
+        error_threshold: 错误率上升的绝对阈值（0.001表示0.1个百分点）
+
+    Returns:
+        List[Tuple]: (端点, 指标, 基线值, 当前值)
+    """
+    regressions = []
+    base_summary = baseline.endpoint_summary()
+    cur_summary = current.endpoint_summary()
+    for ep, base in base_summary.items():
+        cur = cur_summary.get(ep)
+        if cur is None:
+            regressions.append((ep, 'missing', base['count'], 0))
+            continue
+        for metric in ('p50', 'p95', 'p99'):
+            if base[metric] > 0 and (cur[metric] - base[metric]) / base[metric] > threshold:
+                regressions.append((ep, metric, base[metric], cur[metric]))
+        if cur['error_rate'] - base['error_rate'] > error_threshold:
+            regressions.append((ep, 'error_rate', base['error_rate'], cur['error_rate']))
+        if base['throughput'] > 0 and (base['throughput'] - cur['throughput']) / base['throughput'] > threshold:
+            regressions.append((ep, 'throughput', base['throughput'], cur['throughput']))
+    return regressions
+
+
+def render_markdown(current: RunAnalysis, baseline: Optional[RunAnalysis] = None,
+                    regressions: Optional[List[Tuple[str, str, float, float]]] = None) -> str:
+    """
+    生成Markdown格式的分析报告
+
+    Args:
+        current: 当前运行
+        baseline: 可选的基线运行
+        regressions: diff_runs 的结果
+
+    Returns:
+        str: Markdown文本
+    """
+    lines = [f"# 压测分析报告: {current.path}", ""]
+    total = sum(hist.total for hist in current.endpoints.values())
+    errors = sum(current.endpoint_errors.values())
+    lines.append(f"- 请求总数: {total}")
+    lines.append(f"- 错误数: {errors} ({errors / total * 100 if total else 0:.2f}%)")
+    lines.append(f"- 运行时长: {current.duration:.1f}秒")
+    lines.append(f"- 平均吞吐: {total / current.duration if current.duration else 0:.1f} 请求/秒")
+    lines.append("")
+
+    lines.append("## 端点延迟（毫秒）")
+    lines.append("")
+    header = "| 端点 | 请求数 | 错误率 | 吞吐(/s) | 平均 | " + " | ".join(f"p{p:g}" for p in PERCENTILES) + " | 最大 |"
+    lines.append(header)
+    lines.append("|" + "---|" * (header.count('|') - 1))
+    summary = current.endpoint_summary()
+    for ep, stats in sorted(summary.items(), key=lambda item: -item[1]['count']):
+        cells = [ep, str(stats['count']), f"{stats['error_rate'] * 100:.2f}%",
+                 f"{stats['throughput']:.1f}", f"{stats['mean']:.1f}"]
+        cells += [f"{stats[f'p{p:g}']:.1f}" for p in PERCENTILES]
+        cells.append(f"{stats['max']:.1f}")
+        lines.append("| " + " | ".join(cells) + " |")
+    lines.append("")
+
+    if current.expected_interval_ms:
+        lines.append(f"## 协调遗漏修正（期望间隔 {current.expected_interval_ms:g}ms）")
+        lines.append("")
+        lines.append("| 端点 | p99 原始 | p99 修正 | p99.9 原始 | p99.9 修正 |")
+        lines.append("|---|---|---|---|---|")
+        for ep, stats in sorted(summary.items(), key=lambda item: -item[1]['count']):
+            lines.append(f"| {ep} | {stats['p99']:.1f} | {stats['p99_corrected']:.1f} | "
+                         f"{stats['p99.9']:.1f} | {stats['p99.9_corrected']:.1f} |")
+        lines.append("")
+
+    lines.append(f"## 时间序列（窗口 {current.window:g} 秒）")
+    lines.append("")
+    lines.append("| 起始(秒) | 请求数 | 吞吐(/s) | 错误数 | p50 | p95 | p99 |")
+    lines.append("|---|---|---|---|---|---|---|")
+    for key in sorted(current.windows):
+        stats = current.windows[key]
+        hist = stats.histogram
+        lines.append(f"| {key * current.window:g} | {stats.count} | {current.window_throughput(key):.1f} | "
+                     f"{stats.errors} | {hist.percentile(50):.1f} | {hist.percentile(95):.1f} | "
+                     f"{hist.percentile(99):.1f} |")
+    lines.append("")
+
+    lines.append("## 错误分类")
+    lines.append("")
+    if current.errors:
+        lines.append("| 端点 | 状态码 | 错误信息 | 次数 |")
+        lines.append("|---|---|---|---|")
+        for (ep, status, message), count in current.errors.most_common():
+            message = str(message).replace('|', '\\|')
+            lines.append(f"| {ep} | {status} | {message} | {count} |")
+    else:
+        lines.append("无错误")
+    lines.append("")
+
+    if baseline is not None:
+        lines.append(f"## 与基线对比: {baseline.path}")
+        lines.append("")
+        if regressions:
+            lines.append("| 端点 | 指标 | 基线 | 当前 |")
+            lines.append("|---|---|---|---|")
+            for ep, metric, base_value, cur_value in regressions:
+                lines.append(f"| {ep} | {metric} | {base_value:.4g} | {cur_value:.4g} |")
+        else:
+            lines.append("未发现超过阈值的退化")
+        lines.append("")
+
+    return "\n".join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="压测逐请求记录分析")
+    parser.add_argument('run', help="当前运行的JSONL记录文件（ConcurrentTestConfig.record_path）")
+    parser.add_argument('--baseline', default=None, help="用于对比的基线运行记录文件")
+    parser.add_argument('--window', type=float, default=10.0, help="时间序列窗口长度（秒）")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="延迟上升/吞吐下降的退化阈值（相对值，默认0.1即10%%）")
+    parser.add_argument('--error-threshold', type=float, default=0.001,
+                        help="错误率上升的退化阈值（绝对值，默认0.001即0.1个百分点）")
+    parser.add_argument('--expected-interval-ms', type=float, default=None,
+                        help="虚拟用户期望的请求间隔（毫秒），提供时输出修正协调遗漏后的分位数")
+    parser.add_argument('--chunk-size', type=int, default=50000, help="每次读取的行数")
+    parser.add_argument('--output', default=None, help="Markdown报告输出路径，默认打印到控制台")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    命令行入口
+
+    Returns:
+        int: 退出码，与基线对比发现退化时返回1
+    """
+    args = parse_args()
+    current = RunAnalysis(args.run, args.window, args.expected_interval_ms).run(args.chunk_size)
+
+    baseline = None
+    regressions = None
+    if args.baseline:
+        baseline = RunAnalysis(args.baseline, args.window).run(args.chunk_size)
+        regressions = diff_runs(baseline, current, args.threshold, args.error_threshold)
+
+    report = render_markdown(current, baseline, regressions)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report)
+        print(f"报告已写入: {args.output}")
+    else:
+        print(report)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,13 @@
-import aiohttp
+from __future__ import annotations
 import json
+import time
 import logging
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, Union, TYPE_CHECKING
+from metrics import MetricsRecorder, endpoint_name
+from validation import ResponseValidator
+from transport import Transport, aiohttp_request
+if TYPE_CHECKING:  # aiohttp导入耗时较长，只在实际创建会话的地方导入
+    import aiohttp
 
 class APIClient:
     """
@@ -10,16 +16,22 @@ class APIClient:
     提供通用的HTTP请求功能和日志记录，所有具体的API服务类都继承此类
     """
     
-    def __init__(self, base_url: str, debug: bool = False):
+    def __init__(self, base_url: str, debug: bool = False,
+                 recorder: Optional[MetricsRecorder] = None,
+                 validator: Optional[ResponseValidator] = None):
         """
         初始化API客户端
         
         Args:
             base_url: API服务器基础URL
             debug: 是否开启调试模式
+            recorder: 可选的指标记录器，提供时记录每个请求的耗时和结果
+            validator: 可选的响应校验器，提供时按抽样比例校验响应结构
         """
         self.base_url = base_url
         self.debug = debug
+        self.recorder = recorder
+        self.validator = validator
         # 为每个子类创建独立的日志器
         self.logger = logging.getLogger(self.__class__.__name__)
         self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
@@ -48,28 +60,47 @@ class APIClient:
             print(f"响应数据: {json.dumps(data, ensure_ascii=False, indent=2)}")
             print("=" * 50)
     
-    async def _make_request(self, session: aiohttp.ClientSession, method: str, 
+    async def _make_request(self, session: Union[aiohttp.ClientSession, Transport], method: str, 
                           endpoint: str, headers: Optional[Dict] = None, 
-                          data: Optional[Dict] = None) -> Tuple[int, Dict[str, Any]]:
+                          data: Optional[Dict] = None,
+                          metric_name: Optional[str] = None) -> Tuple[int, Dict[str, Any]]:
         """
         通用HTTP请求方法
         
         Args:
-            session: aiohttp会话对象
+            session: aiohttp会话对象，或可替换的传输层（见 transport.py）
             method: HTTP方法（GET, POST等）
             endpoint: API端点路径
             headers: 请求头字典
             data: 请求体数据
+            metric_name: 记录指标和校验响应时使用的端点名称，路径中含有非数字ID时必须指定，
+                         默认由请求路径得出
             
         Returns:
             tuple: (状态码, 响应数据字典)
         """
         url = f"{self.base_url}{endpoint}"
         headers = headers or {}
+        name = metric_name or endpoint_name(endpoint)
+        start = time.perf_counter()
         
-        # 发送HTTP请求并处理响应
-        async with session.request(method, url, headers=headers, json=data) as response:
-            status = response.status
-            # 只有状态码为200时才解析JSON响应
-            response_data = await response.json() if status == 200 else {}
-            return status, response_data
\ No newline at end of file
+        try:
+            # 发送HTTP请求并处理响应
+            if isinstance(session, Transport):
+                status, response_data = await session.request(method, url, headers, data)
+            else:
+                status, response_data = await aiohttp_request(session, method, url, headers, data)
+        except Exception as e:
+            # 网络异常记为状态码0，异常继续向上抛出
+            if self.recorder is not None:
+                self.recorder.record(method, name, 0, (time.perf_counter() - start) * 1000,
+                                     False, type(e).__name__)
+            raise
+        
+        if self.recorder is not None:
+            ok = status == 200 and response_data.get('success') is not False
+            self.recorder.record(method, name, status, (time.perf_counter() - start) * 1000,
+                                 ok, None if ok else response_data.get('message'))
+        if self.validator is not None:
+            self.validator.observe(name, status, response_data)
+        return status, response_data
@@ -1,40 +1,43 @@
-import aiohttp
-from typing import Optional, Tuple
+from __future__ import annotations
+from typing import Optional, Tuple, TYPE_CHECKING
 from api_client import APIClient
+from virtual_user import VirtualUser
+if TYPE_CHECKING:
+    import aiohttp
 
 class AuthService(APIClient):
     """
     认证服务类
     
-    负责用户登录认证和token管理，提供认证相关的功能
+    负责用户登录认证和token管理，提供认证相关的功能。
+    服务本身不保存用户状态，登录结果写入传入的虚拟用户，同一实例可被所有用户共享
     """
     
-    def __init__(self, base_url: str, debug: bool = False):
+    def __init__(self, base_url: str, debug: bool = False, recorder=None, validator=None):
         """
         初始化认证服务
         
         Args:
             base_url: API服务器基础URL
             debug: 是否开启调试模式
+            recorder: 可选的指标记录器
+            validator: 可选的响应校验器
         """
-        super().__init__(base_url, debug)
-        self.user_id: Optional[str] = None  # 用户ID，登录成功后设置
-        self.token: Optional[str] = None    # 认证token，登录成功后设置
+        super().__init__(base_url, debug, recorder, validator)
     
-    async def login(self, session: aiohttp.ClientSession, username: str, password: str) -> bool:
+    async def login(self, session: aiohttp.ClientSession, user: VirtualUser) -> bool:
         """
         用户登录
         
         Args:
             session: aiohttp会话对象
-            username: 用户名
-            password: 密码
+            user: 虚拟用户，登录成功后写入用户ID和token
             
         Returns:
             bool: 登录是否成功
         """
         # 构造登录请求数据
-        login_data = {"account": username, "password": password}
+        login_data = {"account": user.username, "password": user.password}
         
         # 发送登录请求
         status, data = await self._make_request(session, "POST", "/jeecg-boot/api/clientLogin", data=login_data)
@@ -49,24 +52,27 @@ class AuthService(APIClient):
         if data.get('success'):
             result = data['result']
             # 保存用户信息和token
-            self.user_id = result['studentInfo']['id']
-            self.token = result['token']
+            user.user_id = result['studentInfo']['id']
+            user.token = result['token']
             username = result['studentInfo']['userName']
-            self.logger.info(f"登录成功: {username}, 用户ID: {self.user_id}")
+            self.logger.info(f"登录成功: {username}, 用户ID: {user.user_id}")
             return True
         else:
             self.logger.error(f"登录失败: {data.get('message', '未知错误')}")
             return False
     
-    def get_auth_headers(self) -> dict:
+    def get_auth_headers(self, user: VirtualUser) -> dict:
         """
         获取认证请求头
         
+        Args:
+            user: 虚拟用户
+            
         Returns:
             dict: 包含认证信息的请求头字典
         """
         headers = {}
-        if self.token:
+        if user.token:
             # 添加Bearer token到Authorization头
-            headers['Authorization'] = f'Bearer {self.token}'
+            headers['Authorization'] = f'Bearer {user.token}'
         return headers
\ No newline at end of file
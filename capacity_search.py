@@ -0,0 +1,183 @@
+import math
+import asyncio
+import logging
+import dataclasses
+from dataclasses import dataclass
+from typing import List, Optional, Dict, Tuple
+
+from config import ConcurrentTestConfig
+from concurrent_test_manager import ConcurrentTestManager
+from slo import merge_stats
+
+# 未配置SLO时使用的默认判定标准（ConcurrentTestManager 另外会按 min_success_rate 加上用户成功率下限）
+DEFAULT_SLOS = ["error_rate<1%"]
+
+
+@dataclass
+class CapacityPoint:
+    """容量搜索中单次探测的结果"""
+    users: int             # 并发用户数
+    passed: bool           # 是否通过SLO
+    duration: float        # 本次运行耗时（秒）
+    throughput: float      # 整体吞吐（请求/秒）
+    user_rate: float       # 完成用户速率（用户/秒）
+    success_rate: float    # 用户成功率
+    error_rate: float      # 请求错误率
+    p99: float             # 全部请求的p99延迟（毫秒）
+    generator_healthy: Optional[bool] = None  # 压测机是否健康，未开启剖析时为None
+
+
+@dataclass
+class CapacityResult:
+    """容量搜索的最终结果"""
+    max_users: int                  # 满足SLO的最大并发用户数，0表示最小规模也未通过
+    best: Optional[CapacityPoint]   # 最大通过规模对应的探测结果
+    points: List[CapacityPoint]     # 全部探测点，按用户数排序
+
+
+class CapacitySearch:
+    """
+    容量搜索
+
+    先按倍数逐级增加并发用户数，直到SLO未通过，再在最后一个通过和第一个未通过的规模之间二分，
+    找出平台能承受的最大并发用户数。各次探测共享登录缓存，已登录过的账号不再重复登录，
+    全部命中缓存的探测没有登录请求，登录接口的SLO只在实际登录的探测中判定。
+    注意：每次探测都会用同一批账号重新提交问卷，测评任务需允许重复作答
+    """
+
+    def __init__(self, base_url: str, concurrent_config: ConcurrentTestConfig,
+                 start_users: int = 100, max_users: int = 10000, growth: float = 2.0,
+                 precision: float = 0.05, step_pause: float = 5.0):
+        """
+        初始化容量搜索
+
+        Args:
+            base_url: API服务器基础URL
+            concurrent_config: 并发测试配置模板，每次探测只替换 user_count
+            start_users: 起始并发用户数
+            max_users: 搜索上限
+            growth: 逐级增加阶段的倍数
+            precision: 二分阶段的相对精度，区间小于该比例时停止
+            step_pause: 两次探测之间的等待时间（秒），让服务端恢复
+        """
+        self.base_url = base_url
+        self.concurrent_config = concurrent_config
+        self.start_users = start_users
+        self.max_users = max_users
+        self.growth = growth
+        self.precision = precision
+        self.step_pause = step_pause
+        self.token_pool: Dict[str, Tuple[str, str]] = {}
+        self.points: List[CapacityPoint] = []
+        self.logger = logging.getLogger('CapacitySearch')
+
+    async def probe(self, users: int) -> CapacityPoint:
+        """
+        以指定并发用户数运行一次测试
+
+        Args:
+            users: 并发用户数
+
+        Returns:
+            CapacityPoint: 探测结果
+        """
+        self.logger.info(f"--- 探测 {users} 个并发用户 ---")
+        config = dataclasses.replace(
+            self.concurrent_config,
+            user_count=users,
+            slos=self.concurrent_config.slos or DEFAULT_SLOS,
+            # 续跑和逐请求记录对探测没有意义
+            checkpoint_path=None,
+            resume=False,
+            record_path=None,
+            trace_path=None
+        )
+        manager = ConcurrentTestManager(self.base_url, config, self.token_pool)
+        await manager.run_concurrent_tests(debug=False)
+        passed = manager.passed
+
+        stats = merge_stats(manager.recorder.endpoints)
+        duration = manager.total_time or 1e-9
+        success_rate = manager.success_count / users
+        point = CapacityPoint(
+            users=users,
+            passed=passed,
+            duration=manager.total_time,
+            throughput=stats.count / duration,
+            user_rate=manager.success_count / duration,
+            success_rate=success_rate,
+            error_rate=stats.errors / stats.count if stats.count else 0.0,
+            p99=stats.histogram.percentile(99),
+            generator_healthy=manager.generator_health.healthy if manager.generator_health else None
+        )
+        self.points.append(point)
+        self.logger.info(f"探测结果: {users} 用户 {'通过' if passed else '未通过'}，"
+                         f"吞吐 {point.throughput:.1f}/s，p99 {point.p99:.1f}ms，"
+                         f"用户成功率 {success_rate * 100:.2f}%")
+        if point.generator_healthy is False:
+            self.logger.warning(f"{users} 用户时压测机已饱和，该探测点反映的是压测机而非平台的极限")
+        return point
+
+    async def run(self) -> CapacityResult:
+        """
+        执行容量搜索
+
+        Returns:
+            CapacityResult: 搜索结果
+        """
+        passed_users = 0
+        failed_users: Optional[int] = None
+        users = min(self.start_users, self.max_users)
+
+        # 阶段1: 按倍数逐级增加，直到未通过或达到上限
+        while True:
+            point = await self.probe(users)
+            if not point.passed:
+                failed_users = users
+                break
+            passed_users = users
+            if users >= self.max_users:
+                break
+            users = min(self.max_users, max(users + 1, math.ceil(users * self.growth)))
+            await asyncio.sleep(self.step_pause)
+
+        # 阶段2: 在通过和未通过的规模之间二分
+        if failed_users is not None:
+            low, high = passed_users, failed_users
+            while high - low > max(1, math.ceil(low * self.precision)):
+                await asyncio.sleep(self.step_pause)
+                middle = (low + high) // 2
+                if (await self.probe(middle)).passed:
+                    low = middle
+                else:
+                    high = middle
+            passed_users = low
+
+        best = None
+        for point in self.points:
+            if point.users == passed_users and point.passed:
+                best = point
+        result = CapacityResult(passed_users, best, sorted(self.points, key=lambda p: p.users))
+        self._report(result)
+        return result
+
+    def _report(self, result: CapacityResult) -> None:
+        """
+        输出容量曲线和结论
+
+        Args:
+            result: 搜索结果
+        """
+        self.logger.info("=== 容量搜索完成 ===")
+        self.logger.info(f"{'用户数':>8} {'结果':>6} {'吞吐(/s)':>10} {'用户/秒':>8} "
+                         f"{'成功率':>8} {'错误率':>8} {'p99(ms)':>10}")
+        for point in result.points:
+            self.logger.info(f"{point.users:>8} {'通过' if point.passed else '未通过':>6} "
+                             f"{point.throughput:>10.1f} {point.user_rate:>8.1f} "
+                             f"{point.success_rate * 100:>7.2f}% {point.error_rate * 100:>7.3f}% "
+                             f"{point.p99:>10.1f}")
+        if result.best:
+            self.logger.info(f"最大可承受并发用户数: {result.max_users}，"
+                             f"对应吞吐 {result.best.throughput:.1f} 请求/秒")
+        else:
+            self.logger.error(f"起始规模 {self.start_users} 个用户即未通过SLO")
@@ -0,0 +1,232 @@
+import os
+import asyncio
+import logging
+from typing import Dict, Optional, Set, List
+
+# 检查点记录类型：每行一条记录，格式为 "用户名\t类型\t值\n"
+STAGE_LOGIN = 'L'    # 已登录
+STAGE_TASK = 'T'     # 已获取任务，值为任务ID
+STAGE_SUBMIT = 'S'   # 问卷已提交，值为问卷ID
+STAGE_REPORT = 'R'   # 报告已获取，值为问卷ID
+STAGE_DONE = 'D'     # 该用户全部流程完成
+
+
+class UserProgress:
+    """
+    单个用户的测试进度
+
+    记录登录、任务、问卷提交和报告获取情况，每次状态变化都会追加写入检查点
+    """
+
+    __slots__ = ('username', 'checkpoint', 'logged_in', 'task_id',
+                 'submitted', 'reported', 'done')
+
+    def __init__(self, username: str, checkpoint: Optional['ProgressCheckpoint'] = None):
+        """
+        初始化用户进度
+
+        Args:
+            username: 用户名
+            checkpoint: 所属的检查点对象，为None时只在内存中记录
+        """
+        self.username = username
+        self.checkpoint = checkpoint
+        self.logged_in = False
+        self.task_id: Optional[str] = None
+        self.submitted: Set[str] = set()   # 当前任务下已提交的问卷ID
+        self.reported: Set[str] = set()    # 当前任务下已获取报告的问卷ID
+        self.done = False
+
+    def apply(self, stage: str, value: str) -> None:
+        """
+        应用一条进度记录（加载检查点和实时记录共用）
+
+        Args:
+            stage: 记录类型
+            value: 记录值
+        """
+        if stage == STAGE_LOGIN:
+            self.logged_in = True
+        elif stage == STAGE_TASK:
+            # 任务变化时，之前任务的问卷进度不再适用
+            if value != self.task_id:
+                self.submitted.clear()
+                self.reported.clear()
+                self.done = False
+            self.task_id = value
+        elif stage == STAGE_SUBMIT:
+            self.submitted.add(value)
+        elif stage == STAGE_REPORT:
+            self.reported.add(value)
+        elif stage == STAGE_DONE:
+            self.done = True
+
+    def _mark(self, stage: str, value: str = '') -> None:
+        """应用记录并追加到检查点"""
+        self.apply(stage, value)
+        if self.checkpoint is not None:
+            self.checkpoint.record(self.username, stage, value)
+
+    def mark_login(self) -> None:
+        """标记已登录"""
+        self._mark(STAGE_LOGIN)
+
+    def mark_task(self, task_id: str) -> None:
+        """标记已获取任务"""
+        self._mark(STAGE_TASK, str(task_id))
+
+    def mark_submitted(self, scale_id: str) -> None:
+        """标记问卷已提交"""
+        self._mark(STAGE_SUBMIT, str(scale_id))
+
+    def mark_reported(self, scale_id: str) -> None:
+        """标记报告已获取"""
+        self._mark(STAGE_REPORT, str(scale_id))
+
+    def mark_done(self) -> None:
+        """标记该用户全部流程完成"""
+        self._mark(STAGE_DONE)
+
+    def is_submitted(self, scale_id: str) -> bool:
+        """问卷是否已提交"""
+        return str(scale_id) in self.submitted
+
+    def is_reported(self, scale_id: str) -> bool:
+        """报告是否已获取"""
+        return str(scale_id) in self.reported
+
+
+class ProgressCheckpoint:
+    """
+    测试进度检查点
+
+    以追加写入的方式记录每个用户的进度，记录先缓存在内存中，由后台任务定期刷盘。
+    进程中途退出时最多丢失最近一个刷盘周期内的记录，续跑时最后一行不完整的记录会被忽略。
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        """
+        初始化检查点
+
+        Args:
+            path: 检查点文件路径
+            flush_interval: 定期刷盘的间隔（秒）
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.users: Dict[str, UserProgress] = {}
+        self._buffer: List[str] = []
+        self._file = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self.logger = logging.getLogger('ProgressCheckpoint')
+
+    def load(self) -> int:
+        """
+        从检查点文件恢复所有用户的进度
+
+        Returns:
+            int: 已完成全部流程的用户数
+
+        Raises:
+            FileNotFoundError: 检查点文件不存在（续跑时从头开始会让已提交的学生重复提交）
+        """
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"检查点文件不存在，无法续跑: {self.path}")
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                # 进程异常退出时最后一行可能不完整，直接跳过
+                if not line.endswith('\n'):
+                    continue
+                parts = line[:-1].split('\t')
+                if len(parts) != 3:
+                    continue
+                username, stage, value = parts
+                self.progress_for(username).apply(stage, value)
+
+        done_count = sum(1 for progress in self.users.values() if progress.done)
+        self.logger.info(f"已加载检查点: {len(self.users)} 个用户，其中 {done_count} 个已完成")
+        return done_count
+
+    def open(self, resume: bool = False) -> None:
+        """
+        打开检查点文件
+
+        Args:
+            resume: 是否为续跑模式，续跑时追加写入，否则清空旧文件
+        """
+        if resume:
+            self.load()
+            # 截掉上次异常退出时残留的不完整行，保证后续追加的记录能被正确解析
+            self._truncate_partial_line()
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def _truncate_partial_line(self) -> None:
+        """截掉文件末尾不完整的记录"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def progress_for(self, username: str) -> UserProgress:
+        """
+        获取用户进度对象，不存在时创建
+
+        Args:
+            username: 用户名
+
+        Returns:
+            UserProgress: 用户进度
+        """
+        progress = self.users.get(username)
+        if progress is None:
+            progress = UserProgress(username, self)
+            self.users[username] = progress
+        return progress
+
+    def record(self, username: str, stage: str, value: str = '') -> None:
+        """
+        追加一条进度记录（写入内存缓冲区）
+
+        Args:
+            username: 用户名
+            stage: 记录类型
+            value: 记录值
+        """
+        self._buffer.append(f"{username}\t{stage}\t{value}\n")
+
+    def flush(self) -> None:
+        """将缓冲区中的记录写入磁盘"""
+        if not self._buffer or self._file is None:
+            return
+        lines, self._buffer = self._buffer, []
+        self._file.write(''.join(lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    async def _periodic_flush(self) -> None:
+        """后台定期刷盘"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    def start(self) -> None:
+        """启动后台定期刷盘任务"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._periodic_flush())
+
+    async def close(self) -> None:
+        """停止刷盘任务，写入剩余记录并关闭文件"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
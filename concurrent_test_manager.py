@@ -1,10 +1,25 @@
-import aiohttp
+from __future__ import annotations
 import asyncio
 import time
 import logging
-from typing import List
+from collections import Counter
+from typing import List, Optional, Dict, Tuple, Union, TYPE_CHECKING
 from config import TestConfig, ConcurrentTestConfig
 from test_runner import TestRunner
+from virtual_user import VirtualUser
+from checkpoint import ProgressCheckpoint
+from metrics import MetricsRecorder
+from slo import SLO, SLOMonitor, SLOResult
+from feeder import CredentialPool, CredentialFeeder, FeederExhausted
+from profiling import GeneratorProfiler, GeneratorHealth, top_functions
+from transport import Transport, HttpxTransport, PipelinedHTTP1Transport
+from netem import ProfileAssigner, EmulatedTransport
+from validation import ResponseValidator
+from replay import TraceWriter, RecordingTransport
+from repeat_view import ReportIndex, RepeatViewWorkload
+from scale_service import REPEAT_VIEW_METRIC
+if TYPE_CHECKING:
+    import aiohttp
 
 class ConcurrentTestManager:
     """
@@ -13,17 +28,43 @@ class ConcurrentTestManager:
     负责管理和执行大规模并发测试，包括连接池管理、任务调度和结果统计
     """
     
-    def __init__(self, base_url: str, concurrent_config: ConcurrentTestConfig):
+    def __init__(self, base_url: str, concurrent_config: ConcurrentTestConfig,
+                 token_pool: Optional[Dict[str, Tuple[str, str]]] = None):
         """
         初始化并发测试管理器
         
         Args:
             base_url: API服务器基础URL
             concurrent_config: 并发测试配置对象
+            token_pool: 可选的登录缓存，用户名 -> (用户ID, token)，多次运行之间共享可跳过重复登录
         """
         self.base_url = base_url
         self.concurrent_config = concurrent_config
+        self.token_pool = token_pool
         self.logger = self._setup_logger()
+        self.checkpoint: Optional[ProgressCheckpoint] = None
+        self.recorder: Optional[MetricsRecorder] = None
+        self.validator: Optional[ResponseValidator] = None
+        self.trace: Optional[TraceWriter] = None
+        self.repeat_views: Optional[RepeatViewWorkload] = None
+        # 提前解析SLO，表达式有误时在开始压测前就报错
+        self.slos = [SLO(text) for text in concurrent_config.slos]
+        # 未声明用户成功率时按默认下限判定，避免大量用户失败但请求层SLO全部通过
+        if concurrent_config.min_success_rate > 0 and not any(slo.metric == 'success_rate' for slo in self.slos):
+            self.slos.append(SLO(f"success_rate>={concurrent_config.min_success_rate * 100:g}%"))
+        self.slo_results: List[SLOResult] = []
+        self.abort_reason: Optional[str] = None
+        self.feeder: Optional[CredentialFeeder] = None
+        self.generator_health: Optional[GeneratorHealth] = None
+        # 按权重为每个用户分配网络条件，配置有误时在开始压测前就报错
+        self.network = (ProfileAssigner(concurrent_config.network_profiles, concurrent_config.network_seed)
+                        if concurrent_config.network_profiles else None)
+        self.network_users: Counter = Counter()    # 各网络条件下的用户数
+        self.network_success: Counter = Counter()  # 各网络条件下测试成功的用户数
+        self.network_time: Counter = Counter()     # 各网络条件下用户流程的总耗时（秒）
+        self.skipped_count = 0  # 续跑时因已完成而跳过的用户数
+        self.success_count = 0  # 测试成功的用户数（运行结束后统计）
+        self.total_time = 0.0   # 运行总耗时（秒）
     
     def _setup_logger(self) -> logging.Logger:
         """
@@ -51,6 +92,7 @@ class ConcurrentTestManager:
         Returns:
             aiohttp.TCPConnector: 配置好的连接器
         """
+        import aiohttp
         return aiohttp.TCPConnector(
             limit=self.concurrent_config.connection_limit,                    # 总连接数限制
             limit_per_host=self.concurrent_config.connection_limit_per_host,  # 每主机连接数限制
@@ -58,64 +100,223 @@ class ConcurrentTestManager:
             use_dns_cache=True,                                               # 启用DNS缓存
         )
     
-    async def run_concurrent_tests(self, debug: bool = False) -> None:
+    def _create_session(self) -> Union[aiohttp.ClientSession, Transport]:
+        """
+        按配置创建所有用户共享的传输层
+
+        Returns:
+            aiohttp会话（默认），或 transport.py 中的其他传输层
+        """
+        transport = self.concurrent_config.transport
+        if transport == 'aiohttp':
+            import aiohttp
+            return aiohttp.ClientSession(connector=self._create_connector())
+        if transport == 'httpx-h2':
+            return HttpxTransport(http2=True, max_connections=self.concurrent_config.connection_limit)
+        if transport == 'http1-pipeline':
+            return PipelinedHTTP1Transport(
+                self.base_url,
+                connections=self.concurrent_config.pipeline_connections,
+                depth=self.concurrent_config.pipeline_depth
+            )
+        raise ValueError(f"未知的传输层: {transport}")
+    
+    async def run_concurrent_tests(self, debug: bool = False) -> bool:
         """
         运行并发测试的主方法
         
         Args:
             debug: 是否开启调试模式
+            
+        Returns:
+            bool: 是否通过所有SLO（含默认的用户成功率下限），提前终止时为False
         """
         self.logger.info(f"开始 {self.concurrent_config.user_count} 个真正并发测试")
         start_time = time.time()
         
-        # 创建优化的连接器
-        connector = self._create_connector()
+        # 打开进度检查点，续跑模式下先加载已有进度
+        if self.concurrent_config.checkpoint_path:
+            self.checkpoint = ProgressCheckpoint(
+                self.concurrent_config.checkpoint_path,
+                self.concurrent_config.checkpoint_flush_interval
+            )
+            self.checkpoint.open(resume=self.concurrent_config.resume)
+            self.checkpoint.start()
+        
+        # 从账号池取号，账号池只做内存映射，不会整体读入内存
+        pool = None
+        if self.concurrent_config.credential_file:
+            pool = CredentialPool(self.concurrent_config.credential_file)
+            self.feeder = CredentialFeeder(
+                pool,
+                self.concurrent_config.credential_strategy,
+                self.concurrent_config.worker_id,
+                self.concurrent_config.worker_count,
+                self.concurrent_config.credential_seed
+            )
+            self.logger.info(f"账号池: {self.concurrent_config.credential_file}，共 {len(pool)} 个账号，"
+                             f"本进程可用 {self.feeder.size} 个")
+        
+        # 逐请求指标记录器，由所有用户共享
+        self.recorder = MetricsRecorder(
+            self.concurrent_config.record_path,
+            expected_interval_ms=self.concurrent_config.expected_interval_ms,
+            expected_intervals=self.concurrent_config.expected_intervals
+        )
+        
+        # 录制请求轨迹，供 replay.py 回放
+        if self.concurrent_config.trace_path:
+            self.trace = TraceWriter(self.concurrent_config.trace_path)
+        
+        # 抽样校验响应结构，由所有服务共享
+        if self.concurrent_config.validate_every:
+            self.validator = ResponseValidator(
+                self.concurrent_config.validate_every,
+                threaded=self.concurrent_config.validate_in_thread
+            )
+        
+        # 所有虚拟用户共享同一个运行器及其无状态服务，每个用户只创建一个 VirtualUser 状态记录
+        runner = TestRunner(
+            TestConfig(base_url=self.base_url, debug=debug),
+            recorder=self.recorder,
+            token_pool=self.token_pool,
+            validator=self.validator,
+            report_index=ReportIndex() if self.concurrent_config.repeat_view_rate > 0 else None
+        )
+        
+        # 所有并发请求共享同一个会话（或传输层）
+        session = self._create_session()
+        self.logger.info(f"传输层: {self.concurrent_config.transport}")
+        if self.network:
+            self.logger.info("网络条件模拟: " + "，".join(
+                f"{profile.name} x{weight:g}" for profile, weight in zip(self.network.profiles, self.network.weights)))
         
-        # 使用单个会话管理所有并发请求
-        async with aiohttp.ClientSession(connector=connector) as session:
-            # 创建所有用户的测试任务
-            tasks = [
-                self._run_single_user_test(session, i, debug) 
-                for i in range(1, self.concurrent_config.user_count + 1)
-            ]
-            # 并发执行所有任务，收集结果和异常
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            try:
+                # 创建所有用户的测试任务
+                tasks = [
+                    asyncio.create_task(self._run_single_user_test(session, runner, i))
+                    for i in range(1, self.concurrent_config.user_count + 1)
+                ]
+                # SLO明显违反时取消所有未完成的用户任务
+                monitor = SLOMonitor(
+                    self.recorder, self.slos,
+                    interval=self.concurrent_config.slo_check_interval,
+                    min_samples=self.concurrent_config.slo_min_samples,
+                    abort=self.concurrent_config.slo_abort,
+                    on_abort=lambda: [task.cancel() for task in tasks]
+                )
+                monitor.start()
+                # 剖析压测机自身，判断结果是否受压测机饱和影响
+                profiler = None
+                if self.concurrent_config.profile:
+                    profiler = GeneratorProfiler(
+                        sample_stacks=self.concurrent_config.profile_stacks,
+                        profile_start=self.concurrent_config.profile_start,
+                        profile_duration=self.concurrent_config.profile_duration
+                    )
+                    profiler.start()
+                # 报告重复查看与答题流程并行，只查看已成功生成的报告
+                if runner.report_index is not None:
+                    self.repeat_views = RepeatViewWorkload(
+                        runner.scale_service, runner.report_index, session,
+                        self.concurrent_config.repeat_view_rate,
+                        self.concurrent_config.repeat_view_max_in_flight
+                    )
+                    self.repeat_views.start()
+                # 并发执行所有任务，收集结果和异常（被取消的任务结果为CancelledError）
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+                # 提前终止后不再对已经出问题的服务继续发送重复查看
+                if self.repeat_views:
+                    await self.repeat_views.stop(0.0 if monitor.abort_reason else self.concurrent_config.repeat_view_tail)
+                await monitor.stop()
+                if profiler:
+                    self.generator_health = await profiler.stop()
+                self.abort_reason = monitor.abort_reason
+                succeeded = sum(1 for result in results if result is True)
+                # 所有用户都复用了登录时没有登录请求，登录接口的SLO没有样本，不参与判定
+                skip_endpoints = []
+                login = self.recorder.endpoints.get('clientLogin')
+                if runner.reused_logins and not (login and login.count):
+                    skip_endpoints.append('clientLogin')
+                    if any(slo.endpoint == 'clientLogin' for slo in self.slos):
+                        self.logger.info(f"本次运行 {runner.reused_logins} 个用户复用登录，没有登录请求，"
+                                         f"clientLogin 的SLO不参与判定")
+                self.slo_results = monitor.evaluate(users=(succeeded, len(results)),
+                                                    skip_endpoints=skip_endpoints)
+            finally:
+                await session.close()
+        finally:
+            # 无论是否异常退出都把剩余进度写入磁盘
+            if self.checkpoint:
+                await self.checkpoint.close()
+            self.recorder.close()
+            if self.validator:
+                self.validator.close()
+            if self.trace:
+                self.trace.close()
+            if pool:
+                pool.close()
         
         # 统计和报告测试结果
         self._report_results(results, start_time)
+        return self.passed
+    
+    @property
+    def passed(self) -> bool:
+        """本次运行是否通过：未提前终止且所有SLO均满足"""
+        return self.abort_reason is None and all(result.passed for result in self.slo_results)
     
-    async def _run_single_user_test(self, session: aiohttp.ClientSession, 
-                                   user_index: int, debug: bool) -> bool:
+    async def _run_single_user_test(self, session: Union[aiohttp.ClientSession, Transport],
+                                   runner: TestRunner, user_index: int) -> bool:
         """
         运行单个用户的测试
         
         Args:
-            session: 共享的aiohttp会话对象
+            session: 共享的aiohttp会话对象或传输层
+            runner: 共享的测试运行器
             user_index: 用户索引，用于生成用户名
-            debug: 是否开启调试模式
             
         Returns:
             bool: 测试是否成功
         """
-        # 生成测试用户名和密码
-        username = f"test{user_index:04d}"  # 格式化为test0001, test0002等
-        password = "123456"
-        
-        # 创建测试配置
-        config = TestConfig(
-            base_url=self.base_url,
-            username=username,
-            password=password,
-            debug=debug
-        )
+        # 生成测试用户（账号池中带有预登录token时直接使用）
+        if self.feeder:
+            try:
+                credential = self.feeder.next()
+            except (FeederExhausted, ValueError) as e:
+                # 账号用完或账号池中该行格式错误
+                self.logger.error(f"用户 {user_index} 无法取号: {e}")
+                return False
+            user = VirtualUser(credential.username, credential.password,
+                               credential.user_id, credential.token)
+        else:
+            # 格式化为test0001, test0002等
+            user = VirtualUser(f"test{user_index:04d}", "123456")
+        username = user.username
+        
+        # 续跑模式下跳过已完成全部流程的用户
+        progress = self.checkpoint.progress_for(username) if self.checkpoint else None
+        if progress and progress.done:
+            self.skipped_count += 1
+            return True
         
-        # 创建测试运行器
-        runner = TestRunner(config)
+        # 为该用户套上网络条件模拟，底层仍复用共享的session
+        profile = None
+        if self.network:
+            profile = self.network.assign()
+            if not profile.is_noop:
+                session = EmulatedTransport(session, profile, self.network.rng)
+            self.network_users[profile.name] += 1
+        # 在网络条件模拟之外录制，轨迹中的时间为用户发出请求的时间
+        if self.trace:
+            session = RecordingTransport(session, self.trace, username)
         
+        start_time = time.time()
+        success = False
         try:
-            start_time = time.time()
             # 执行测试，复用传入的session
-            success = await runner.run_test(session)
+            success = await runner.run_user(session, user, progress)
             end_time = time.time()
             
             # 记录测试结果
@@ -130,6 +331,11 @@ class ConcurrentTestManager:
             # 捕获并记录异常
             self.logger.error(f"用户 {username} 测试异常: {str(e)}")
             return False
+        finally:
+            # 连接中断等异常退出的用户同样计入耗时，否则丢包严重的网络条件平均耗时偏低
+            if profile:
+                self.network_time[profile.name] += time.time() - start_time
+                self.network_success[profile.name] += success
     
     def _report_results(self, results: List, start_time: float) -> None:
         """
@@ -144,12 +350,98 @@ class ConcurrentTestManager:
         success_count = sum(1 for result in results if result is True)
         failed_count = len(results) - success_count
         total_time = end_time - start_time
+        self.success_count = success_count
+        self.total_time = total_time
         
         # 输出详细的测试报告
         self.logger.info(f"=== {self.concurrent_config.user_count}并发测试完成 ===")
         self.logger.info(f"总用户数: {self.concurrent_config.user_count}")
         self.logger.info(f"成功: {success_count}")
         self.logger.info(f"失败: {failed_count}")
+        if self.skipped_count:
+            self.logger.info(f"续跑跳过（已完成）: {self.skipped_count}")
         self.logger.info(f"成功率: {success_count/self.concurrent_config.user_count*100:.2f}%")
         self.logger.info(f"总耗时: {total_time:.2f}秒")
-        self.logger.info(f"QPS: {self.concurrent_config.user_count/total_time:.2f}")
\ No newline at end of file
+        self.logger.info(f"QPS: {(self.concurrent_config.user_count - self.skipped_count)/total_time:.2f}")
+        
+        # 输出每个端点的请求统计
+        if self.recorder:
+            for name, stats in self.recorder.summary():
+                self.logger.info(
+                    f"[{name}] 请求: {stats['count']}  错误率: {stats['error_rate']*100:.2f}%  "
+                    f"p50: {stats['p50']:.1f}ms  p95: {stats['p95']:.1f}ms  "
+                    f"p99: {stats['p99']:.1f}ms  最大: {stats['max']:.1f}ms"
+                )
+                # 修正协调遗漏后的分位数与原始值并列输出
+                if stats['p99_corrected'] is not None:
+                    self.logger.info(
+                        f"[{name}] 修正后 p95: {stats['p95_corrected']:.1f}ms  "
+                        f"p99: {stats['p99_corrected']:.1f}ms（原始 p95: {stats['p95']:.1f}ms  "
+                        f"p99: {stats['p99']:.1f}ms）"
+                    )
+        
+        # 对比报告首次查看和重复查看的延迟
+        if self.repeat_views:
+            views = self.repeat_views
+            self.logger.info(f"报告重复查看: 发出 {views.issued}  失败 {views.failed}  "
+                             f"因在途上限跳过 {views.skipped}  可查看报告 {len(views.index)} 份")
+            stats = self.recorder.endpoints if self.recorder else {}
+            first, repeat = stats.get('getReportUserInfo'), stats.get(REPEAT_VIEW_METRIC)
+            if first and repeat and first.count and repeat.count:
+                self.logger.info(
+                    f"报告查看延迟 首次 p50/p99: {first.histogram.percentile(50):.1f}/"
+                    f"{first.histogram.percentile(99):.1f}ms  重复 p50/p99: {repeat.histogram.percentile(50):.1f}/"
+                    f"{repeat.histogram.percentile(99):.1f}ms（重复/首次 p50 = "
+                    f"{repeat.histogram.percentile(50) / max(first.histogram.percentile(50), 1e-9):.2f}）"
+                )
+        
+        # 输出响应校验结果，失败按类别分列
+        if self.validator:
+            for name, checked, failures in self.validator.summary():
+                failed = sum(count for _, count, _ in failures)
+                self.logger.info(f"[校验 {name}] 抽样校验: {checked}  失败: {failed}")
+                for category, count, example in failures:
+                    self.logger.warning(f"[校验 {name}]   {category}: {count} 次（{example}）")
+        
+        # 输出各网络条件下的用户结果
+        for name, users in self.network_users.items():
+            succeeded = self.network_success[name]
+            self.logger.info(
+                f"[网络 {name}] 用户: {users}  成功率: {succeeded / users * 100:.2f}%  "
+                f"平均流程耗时: {self.network_time[name] / users:.2f}秒"
+            )
+        
+        # 输出压测机健康结论
+        health = self.generator_health
+        if health:
+            self.logger.info(f"压测机事件循环延迟 p99: {health.loop_lag_p99:.1f}ms  最大: {health.loop_lag_max:.1f}ms  "
+                             f"CPU占用 平均: {health.cpu_percent:.1f}%  峰值: {health.cpu_peak:.1f}%")
+            if health.healthy:
+                self.logger.info("压测机状态: 健康，结果可信")
+            else:
+                self.logger.warning(f"压测机状态: 饱和，延迟和吞吐结果受压测机自身限制（{'；'.join(health.reasons)}）")
+            if health.idle_ratio is not None:
+                self.logger.info(f"栈采样: 事件循环空闲 {health.idle_ratio * 100:.1f}%")
+            for stack, count in health.hot_frames[:5]:
+                self.logger.info(f"栈采样热点 x{count}: {stack}")
+            if health.profile_path:
+                for line in top_functions(health.profile_path, 5):
+                    self.logger.info(f"剖析热点: {line}")
+        
+        # 输出SLO判定结果
+        if self.abort_reason:
+            self.logger.error(f"测试已提前终止: {self.abort_reason}")
+        if self.slo_results:
+            self.logger.info(f"=== SLO判定: {'通过' if self.passed else '未通过'} ===")
+            for result in self.slo_results:
+                if result.passed:
+                    self.logger.info(result.describe())
+                else:
+                    self.logger.error(result.describe())
+        
+        if self.trace:
+            self.logger.info(f"请求轨迹已写入: {self.concurrent_config.trace_path}（{self.trace.count} 个请求），"
+                             f"可用 replay.py 回放")
+        if self.recorder and self.concurrent_config.record_path:
+            self.logger.info(f"逐请求记录已写入: {self.concurrent_config.record_path}，"
+                             f"可用 analyze.py 生成详细报告")
\ No newline at end of file
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict
 
 @dataclass
 class TestConfig:
@@ -28,6 +28,37 @@ class ConcurrentTestConfig:
     connection_limit: int = 2000  # 总连接数限制
     connection_limit_per_host: int = 1500  # 每个主机的连接数限制
     dns_cache_ttl: int = 300  # DNS缓存生存时间（秒）
+    transport: str = 'aiohttp'  # 传输层：aiohttp / httpx-h2（HTTP/2多路复用）/ http1-pipeline（HTTP/1.1流水线）
+    pipeline_connections: int = 64  # http1-pipeline 的长连接数量
+    pipeline_depth: int = 16  # http1-pipeline 每条连接同时在途的最大请求数
+    network_profiles: Dict[str, float] = field(default_factory=dict)  # 网络条件模拟：条件名称或参数 -> 用户占比权重，空表示不模拟
+    network_seed: Optional[int] = None  # 网络条件分配和丢包的随机种子
+    checkpoint_path: Optional[str] = None  # 进度检查点文件路径，None表示不记录进度
+    checkpoint_flush_interval: float = 1.0  # 检查点定期刷盘间隔（秒）
+    resume: bool = False  # 是否从检查点续跑，跳过已完成的用户和已提交的问卷
+    record_path: Optional[str] = None  # 逐请求记录的JSONL文件路径，供 analyze.py 分析
+    repeat_view_rate: float = 0.0  # 报告重复查看负载：每秒重复查看次数，0表示不开启
+    repeat_view_tail: float = 0.0  # 答题流程结束后继续重复查看的时间（秒）
+    repeat_view_max_in_flight: int = 1000  # 在途重复查看请求上限
+    trace_path: Optional[str] = None  # 请求轨迹文件路径（.gz压缩），供 replay.py 回放
+    validate_every: int = 0  # 响应结构校验抽样：每N个响应校验1个，0表示不校验
+    validate_in_thread: bool = False  # 是否在后台线程中校验响应
+    slos: List[str] = field(default_factory=list)  # SLO表达式，如 "p99:getResult<800"、"error_rate<0.5%"
+    slo_check_interval: float = 5.0  # 运行期间检查SLO的周期（秒）
+    slo_min_samples: int = 100  # 每个周期内少于该样本数时不做判断
+    slo_abort: bool = False  # SLO明显违反时是否提前终止测试
+    min_success_rate: float = 0.99  # 用户成功率下限，未声明 success_rate SLO 时作为默认判定，0表示不检查
+    expected_interval_ms: Optional[float] = None  # 虚拟用户期望的请求间隔（毫秒），用于修正协调遗漏
+    expected_intervals: Dict[str, float] = field(default_factory=dict)  # 按端点名指定的期望间隔，如 {"getResult": 200}
+    credential_file: Optional[str] = None  # 账号池文件（feeder.py 生成的二进制池或CSV），None时使用 test0001 规则
+    credential_strategy: str = 'sequential'  # 取号策略：sequential / random / unique / shard
+    credential_seed: Optional[int] = None  # 取号随机种子，多进程使用unique策略时需一致
+    worker_id: int = 0  # 当前压测进程编号，多进程时按条带划分账号
+    worker_count: int = 1  # 压测进程总数
+    profile: bool = False  # 是否剖析压测机自身（事件循环延迟、CPU占用）并给出健康结论
+    profile_stacks: bool = False  # 剖析时是否开启栈采样
+    profile_start: Optional[float] = None  # 运行开始后多少秒开启函数级剖析（cProfile/yappi），None表示不开启
+    profile_duration: float = 10.0  # 函数级剖析持续时间（秒）
 
 @dataclass
 class AdminConfig:
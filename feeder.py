@@ -0,0 +1,356 @@
+import io
+import os
+import csv
+import sys
+import mmap
+import random
+import struct
+import argparse
+from array import array
+from typing import Optional, Iterator, Tuple
+
+# 二进制账号池文件头: 魔数, 版本, 记录长度, 4个字段宽度, 记录数
+_MAGIC = b'CRPL'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHH4HQ')
+FIELDS = ('username', 'password', 'user_id', 'token')
+DEFAULT_WIDTHS = (32, 32, 24, 0)   # 各字段的定长字节数，不足部分以\0填充；token默认不存
+
+STRATEGIES = ('sequential', 'random', 'unique', 'shard')
+
+
+class FeederExhausted(Exception):
+    """不重复取号策略下账号已用完"""
+
+
+class Credential:
+    """单个账号凭据，user_id 和 token 为可选的预登录缓存"""
+
+    __slots__ = ('username', 'password', 'user_id', 'token')
+
+    def __init__(self, username: str, password: str,
+                 user_id: Optional[str] = None, token: Optional[str] = None):
+        self.username = username
+        self.password = password
+        self.user_id = user_id or None
+        self.token = token or None
+
+
+class CredentialPool:
+    """
+    内存映射的账号池
+
+    支持两种文件格式：
+    - 二进制账号池（由 build_pool 生成）：定长记录，按下标直接定位，打开时不需要扫描文件；
+    - CSV（username,password[,user_id,token]）：打开时扫描一遍换行位置建立偏移索引。
+    文件内容通过mmap按需分页读取，只有被取到的记录才会解码为字符串
+    """
+
+    def __init__(self, path: str):
+        """
+        打开账号池文件
+
+        Args:
+            path: 二进制账号池或CSV文件路径
+
+        Raises:
+            ValueError: 文件为空或格式不正确
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.close()
+            raise ValueError(f"账号池文件为空: {path}")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._offsets: Optional[array] = None
+
+        if self._mmap[:4] == _MAGIC:
+            magic, version, record_size, *widths, count = _HEADER.unpack_from(self._mmap, 0)
+            if version != _VERSION:
+                raise ValueError(f"不支持的账号池版本: {version}")
+            self.record_size = record_size
+            self.widths = tuple(widths)
+            self.count = count
+        else:
+            self._offsets = self._index_csv()
+            self.count = len(self._offsets) - 1
+
+    def _index_csv(self) -> array:
+        """扫描CSV中每行的起始偏移，跳过表头和空行"""
+        data = self._mmap
+        offsets = array('Q')
+        position = 0
+        size = len(data)
+        # 第一行以username开头时视为表头
+        if data[:8].lower() == b'username':
+            position = data.find(b'\n') + 1 or size
+        while position < size:
+            end = data.find(b'\n', position)
+            if end < 0:
+                end = size
+            if end > position and data[position:end].strip():
+                offsets.append(position)
+            position = end + 1
+        offsets.append(size + 1)  # 哨兵，便于计算最后一行的结束位置
+        return offsets
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, index: int) -> Credential:
+        """
+        按下标读取账号
+
+        Args:
+            index: 账号下标（0 ~ count-1）
+
+        Returns:
+            Credential: 账号凭据
+
+        Raises:
+            ValueError: CSV中该行少于 username,password 两列
+        """
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+
+        if self._offsets is None:
+            start = _HEADER.size + index * self.record_size
+            values = []
+            for width in self.widths:
+                field = self._view[start:start + width]
+                values.append(bytes(field).rstrip(b'\0').decode('utf-8'))
+                start += width
+            return Credential(*values)
+
+        start, end = self._offsets[index], self._offsets[index + 1] - 1
+        line = bytes(self._view[start:end]).decode('utf-8').rstrip('\r')
+        values = next(csv.reader([line]))
+        if len(values) < 2:
+            # 只在出错时统计行号，正常取号不需要
+            line_number = bytes(self._view[:start]).count(b'\n') + 1
+            raise ValueError(f"账号池 {self.path} 第 {line_number} 行格式错误，"
+                             f"需要 username,password[,user_id,token]: {line.strip()!r}")
+        return Credential(*(value.strip() for value in values[:4]))
+
+    def close(self) -> None:
+        """关闭内存映射和文件"""
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+
+def _permute(index: int, size: int, seed: int) -> int:
+    """
+    把 [0, size) 内的下标映射为一个伪随机排列中的位置，不需要额外内存
+
+    在2的幂范围内组合两轮可逆变换（奇数乘法加常数、右移异或），
+    落在 size 之外时继续迭代（cycle walking），保证结果仍是 [0, size) 上的排列
+    """
+    bits = max(1, (size - 1).bit_length())
+    mask = (1 << bits) - 1
+    shift = (bits + 1) // 2
+    multiplier = (seed * 8 + 0x9E3779B5) & mask | 1   # 奇数乘数在模2的幂下可逆
+    increment = (seed * 2 + 1) & mask
+    value = index
+    while True:
+        for _ in range(2):
+            value = (value * multiplier + increment) & mask
+            value ^= value >> shift
+        if value < size:
+            return value
+
+
+class CredentialFeeder:
+    """
+    账号取号器
+
+    取号策略：
+    - sequential: 顺序取号，用完后从头循环
+    - random: 随机取号，允许重复
+    - unique: 随机顺序且每个账号本次运行只取一次，用完抛出 FeederExhausted
+    - shard: 按顺序且每个账号只取一次，用完抛出 FeederExhausted
+    worker_count > 1 时每个进程只使用 worker_id, worker_id + worker_count, ... 这一条带，
+    配合 unique 或 shard 策略可保证多进程运行时不会重复使用账号
+    """
+
+    def __init__(self, pool: CredentialPool, strategy: str = 'sequential',
+                 worker_id: int = 0, worker_count: int = 1, seed: Optional[int] = None):
+        """
+        初始化取号器
+
+        Args:
+            pool: 账号池
+            strategy: 取号策略
+            worker_id: 当前进程编号（从0开始）
+            worker_count: 进程总数
+            seed: 随机种子，多进程使用 unique 策略时必须相同
+
+        Raises:
+            ValueError: 策略名称或进程编号不正确
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"未知的取号策略: {strategy}，可选: {', '.join(STRATEGIES)}")
+        if not 0 <= worker_id < worker_count:
+            raise ValueError(f"进程编号 {worker_id} 超出范围 [0, {worker_count})")
+        self.pool = pool
+        self.strategy = strategy
+        self.worker_id = worker_id
+        self.worker_count = worker_count
+        self.seed = seed if seed is not None else 0
+        self._random = random.Random(seed)
+        # 当前进程条带内的账号数
+        self.size = max(0, (len(pool) - worker_id + worker_count - 1) // worker_count)
+        self._next = 0
+
+    def _shard_index(self, position: int) -> int:
+        """条带内位置转换为账号池下标"""
+        return self.worker_id + position * self.worker_count
+
+    def next(self) -> Credential:
+        """
+        取下一个账号
+
+        Returns:
+            Credential: 账号凭据
+
+        Raises:
+            FeederExhausted: 不重复策略下账号已用完，或条带内没有账号
+        """
+        if not self.size:
+            raise FeederExhausted(f"进程 {self.worker_id} 没有可用账号")
+
+        if self.strategy == 'random':
+            return self.pool.get(self._shard_index(self._random.randrange(self.size)))
+
+        position = self._next
+        if self.strategy == 'sequential':
+            self._next = (position + 1) % self.size
+            return self.pool.get(self._shard_index(position))
+
+        if position >= self.size:
+            raise FeederExhausted(f"账号已用完（共 {self.size} 个）")
+        self._next = position + 1
+        if self.strategy == 'unique':
+            position = _permute(position, self.size, self.seed)
+        return self.pool.get(self._shard_index(position))
+
+    def __iter__(self) -> Iterator[Credential]:
+        while True:
+            try:
+                yield self.next()
+            except FeederExhausted:
+                return
+
+
+def _encode_record(values: Tuple[str, ...], widths: Tuple[int, ...]) -> bytes:
+    """按定长编码一条记录，超长字段报错"""
+    record = io.BytesIO()
+    for name, value, width in zip(FIELDS, values, widths):
+        data = value.encode('utf-8')
+        if len(data) > width:
+            raise ValueError(f"字段 {name} 超过 {width} 字节: {value[:40]}")
+        record.write(data.ljust(width, b'\0'))
+    return record.getvalue()
+
+
+def build_pool(rows: Iterator[Tuple[str, ...]], pool_path: str,
+               widths: Tuple[int, ...] = DEFAULT_WIDTHS) -> int:
+    """
+    生成二进制账号池文件
+
+    Args:
+        rows: 账号记录，每条为 (username, password[, user_id, token])
+        pool_path: 输出文件路径
+        widths: 4个字段的定长字节数
+
+    Returns:
+        int: 写入的记录数
+    """
+    count = 0
+    with open(pool_path, 'wb') as f:
+        f.write(b'\0' * _HEADER.size)   # 先占位，写完后回填记录数
+        for row in rows:
+            values = tuple(row) + ('',) * (4 - len(row))
+            f.write(_encode_record(values[:4], widths))
+            count += 1
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, _VERSION, sum(widths), *widths, count))
+    return count
+
+
+def read_csv_rows(csv_path: str) -> Iterator[Tuple[str, ...]]:
+    """
+    流式读取账号CSV
+
+    Args:
+        csv_path: CSV文件路径，列为 username,password[,user_id,token]，表头可选
+
+    Yields:
+        Tuple[str, ...]: 一条账号记录
+
+    Raises:
+        ValueError: 某行少于 username,password 两列
+    """
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        for i, row in enumerate(reader):
+            if not row or (i == 0 and row[0].strip().lower() == 'username'):
+                continue
+            if len(row) < 2:
+                raise ValueError(f"{csv_path} 第 {reader.line_num} 行格式错误，"
+                                 f"需要 username,password[,user_id,token]: {','.join(row)!r}")
+            yield tuple(value.strip() for value in row[:4])
+
+
+def generate_rows(count: int, prefix: str = 'test', password: str = '123456',
+                  start: int = 1, digits: int = 4) -> Iterator[Tuple[str, str]]:
+    """
+    按编号生成测试账号（与默认的 test0001 命名规则一致）
+
+    Args:
+        count: 账号数量
+        prefix: 用户名前缀
+        password: 统一密码
+        start: 起始编号
+        digits: 编号最少位数
+
+    Yields:
+        Tuple[str, str]: (用户名, 密码)
+    """
+    for i in range(start, start + count):
+        yield f"{prefix}{i:0{digits}d}", password
+
+
+def main() -> int:
+    """命令行入口：从CSV生成账号池，或按编号生成测试账号池"""
+    parser = argparse.ArgumentParser(description="账号池生成工具")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help="从CSV生成二进制账号池")
+    build.add_argument('csv', help="CSV文件，列为 username,password[,user_id,token]")
+    build.add_argument('output', help="输出的账号池文件")
+    build.add_argument('--token-width', type=int, default=0,
+                       help="token字段的定长字节数，CSV中包含预登录token时需要设置（如512）")
+
+    gen = sub.add_parser('generate', help="按编号生成测试账号池")
+    gen.add_argument('output', help="输出的账号池文件")
+    gen.add_argument('--count', type=int, required=True, help="账号数量")
+    gen.add_argument('--prefix', default='test', help="用户名前缀")
+    gen.add_argument('--password', default='123456', help="统一密码")
+    gen.add_argument('--start', type=int, default=1, help="起始编号")
+    gen.add_argument('--digits', type=int, default=4, help="编号最少位数")
+
+    args = parser.parse_args()
+    if args.command == 'build':
+        widths = DEFAULT_WIDTHS[:3] + (args.token_width,)
+        count = build_pool(read_csv_rows(args.csv), args.output, widths)
+    else:
+        count = build_pool(generate_rows(args.count, args.prefix, args.password,
+                                         args.start, args.digits), args.output)
+    print(f"已写入 {count} 个账号: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
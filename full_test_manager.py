@@ -44,13 +44,15 @@ class FullTestManager:
         await asyncio.sleep(3)
         
         # 学生端自行搜索和执行任务
-        await self._run_student_concurrent_tests()
+        slo_passed = await self._run_student_concurrent_tests()
 
         #获取预警报告
         await self._get_warning_report()
 
         self.logger.info("=== 完整测试流程结束 ===")
-        return True
+        if not slo_passed:
+            self.logger.error("学生并发测试未通过SLO判定")
+        return slo_passed
     
     async def _admin_publish_evaluation(self) -> Union[str, None, bool]:
         """管理员发布测评"""
@@ -63,17 +65,22 @@ class FullTestManager:
             ):
                 return False
             
+            # 续跑时任务已经发布过，重复发布会产生新任务导致学生进度失效
+            if self.concurrent_config.resume:
+                self.logger.info("续跑模式，跳过发布测评")
+                return True
+            
             return await self.admin_service.publish_evaluation(
                 session, self.admin_config.task_name, self.admin_config.scale_id
             )
     
-    async def _run_student_concurrent_tests(self):
-        """执行学生并发测试"""
+    async def _run_student_concurrent_tests(self) -> bool:
+        """执行学生并发测试，返回是否通过SLO判定"""
         self.logger.info("开始学生并发测试...")
         manager = ConcurrentTestManager(
             self.admin_config.base_url, self.concurrent_config
         )
-        await manager.run_concurrent_tests(debug=False)
+        return await manager.run_concurrent_tests(debug=False)
 
     async def _get_warning_report(self) :
         """获取学生的预警信息"""
@@ -0,0 +1,319 @@
+import re
+import math
+import json
+import time
+from array import array
+from typing import Dict, Any, Optional, List, Tuple
+
+# 端点路径中的数字段（用户ID、时间戳等）不参与端点归类
+_ID_SEGMENT = re.compile(r'^\d+$')
+
+
+def endpoint_name(endpoint: str) -> str:
+    """
+    将请求路径归一化为端点名称
+
+    去掉查询参数和路径中的纯数字ID段，取最后一段作为名称，
+    例如 /jeecg-boot/api/isUserHasTask/123 -> isUserHasTask。
+    只用于没有显式端点名称的请求（回放、管理员接口），非数字ID无法识别，
+    路径含这类ID的服务应向 APIClient._make_request 传入 metric_name
+
+    Args:
+        endpoint: API端点路径
+
+    Returns:
+        str: 端点名称
+    """
+    path = endpoint.split('?', 1)[0]
+    segments = [seg for seg in path.split('/') if seg and not _ID_SEGMENT.match(seg)]
+    return segments[-1] if segments else path
+
+
+class LatencyHistogram:
+    """
+    对数分桶的延迟直方图
+
+    以固定的相对精度（约2%）记录延迟，内存占用固定，与样本数量无关，
+    可合并，适合对百万级请求计算分位数
+    """
+
+    MIN_MS = 0.1                      # 最小可区分延迟（毫秒）
+    GROWTH = 1.02                     # 相邻桶的比例，决定相对精度
+    BUCKET_COUNT = 900                # 覆盖 0.1ms ~ 约90分钟
+    _LOG_GROWTH = math.log(GROWTH)
+
+    __slots__ = ('counts', 'total', 'sum', 'max')
+
+    def __init__(self):
+        """初始化空直方图"""
+        self.counts = array('q', bytes(8 * self.BUCKET_COUNT))
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    @classmethod
+    def bucket_index(cls, value_ms: float) -> int:
+        """
+        计算延迟值所在的桶
+
+        Args:
+            value_ms: 延迟（毫秒）
+
+        Returns:
+            int: 桶下标
+        """
+        if value_ms <= cls.MIN_MS:
+            return 0
+        index = int(math.log(value_ms / cls.MIN_MS) / cls._LOG_GROWTH) + 1
+        return index if index < cls.BUCKET_COUNT else cls.BUCKET_COUNT - 1
+
+    @classmethod
+    def bucket_value(cls, index: int) -> float:
+        """
+        桶的代表值（桶上界）
+
+        Args:
+            index: 桶下标
+
+        Returns:
+            float: 延迟（毫秒）
+        """
+        return cls.MIN_MS * cls.GROWTH ** index
+
+    def record(self, value_ms: float, count: int = 1) -> None:
+        """
+        记录一个延迟样本
+
+        Args:
+            value_ms: 延迟（毫秒）
+            count: 样本重复次数
+        """
+        self.counts[self.bucket_index(value_ms)] += count
+        self.total += count
+        self.sum += value_ms * count
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def record_with_expected_interval(self, value_ms: float, expected_interval_ms: float) -> None:
+        """
+        记录延迟样本并修正协调遗漏（coordinated omission）
+
+        与 HdrHistogram 的 recordValueWithExpectedInterval 相同：虚拟用户在等待慢响应期间
+        本应按 expected_interval_ms 的间隔继续发送请求，这些被推迟的请求按
+        value - interval、value - 2*interval ... 补录，直到小于期望间隔
+
+        Args:
+            value_ms: 实测延迟（毫秒）
+            expected_interval_ms: 期望的请求间隔（毫秒），不大于0时不做修正
+        """
+        self.record(value_ms)
+        if expected_interval_ms <= 0 or value_ms <= expected_interval_ms:
+            return
+        missing = value_ms - expected_interval_ms
+        while missing >= expected_interval_ms:
+            self.record(missing)
+            missing -= expected_interval_ms
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        """
+        合并另一个直方图
+
+        Args:
+            other: 要合并的直方图
+        """
+        counts = self.counts
+        for i, c in enumerate(other.counts):
+            if c:
+                counts[i] += c
+        self.total += other.total
+        self.sum += other.sum
+        if other.max > self.max:
+            self.max = other.max
+
+    def percentile(self, p: float) -> float:
+        """
+        计算分位数
+
+        Args:
+            p: 百分位（0~100）
+
+        Returns:
+            float: 延迟（毫秒），无样本时返回0
+        """
+        if not self.total:
+            return 0.0
+        target = max(1, math.ceil(self.total * p / 100.0))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(self.bucket_value(i), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        """平均延迟（毫秒）"""
+        return self.sum / self.total if self.total else 0.0
+
+    def copy(self) -> 'LatencyHistogram':
+        """
+        复制直方图
+
+        Returns:
+            LatencyHistogram: 新的直方图
+        """
+        other = LatencyHistogram()
+        other.counts = array('q', self.counts)
+        other.total = self.total
+        other.sum = self.sum
+        other.max = self.max
+        return other
+
+    def delta(self, previous: 'LatencyHistogram') -> 'LatencyHistogram':
+        """
+        计算相对于之前快照新增的样本，用于统计最近一段时间的延迟
+
+        Args:
+            previous: 之前的快照（由 copy 得到）
+
+        Returns:
+            LatencyHistogram: 只包含新增样本的直方图（max取当前最大值）
+        """
+        other = LatencyHistogram()
+        other.counts = array('q', (a - b for a, b in zip(self.counts, previous.counts)))
+        other.total = self.total - previous.total
+        other.sum = self.sum - previous.sum
+        other.max = self.max
+        return other
+
+
+class EndpointStats:
+    """单个端点的实时统计"""
+
+    __slots__ = ('histogram', 'corrected', 'count', 'errors', 'first_t', 'last_t')
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.corrected: Optional[LatencyHistogram] = None  # 修正协调遗漏后的直方图
+        self.count = 0
+        self.errors = 0
+        self.first_t = 0.0   # 第一个请求完成的时间
+        self.last_t = 0.0    # 最近一个请求完成的时间
+
+    @property
+    def throughput(self) -> float:
+        """该端点活跃期间的吞吐（请求/秒）"""
+        elapsed = self.last_t - self.first_t
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+
+class MetricsRecorder:
+    """
+    逐请求指标记录器
+
+    在内存中维护每个端点的延迟直方图和错误数，供运行结束时汇总；
+    指定文件路径时同时把每个请求追加写入JSONL文件，供 analyze.py 离线分析。
+    每行字段：t 时间戳(秒)，ep 端点名，m 方法，s 状态码，ms 延迟(毫秒)，ok 是否成功，msg 失败信息。
+    配置了期望请求间隔的端点会额外维护一份修正协调遗漏后的直方图
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_every: int = 1000,
+                 expected_interval_ms: Optional[float] = None,
+                 expected_intervals: Optional[Dict[str, float]] = None):
+        """
+        初始化记录器
+
+        Args:
+            path: JSONL输出文件路径，None表示只在内存中统计
+            flush_every: 缓冲多少条记录后写入文件
+            expected_interval_ms: 所有端点默认的期望请求间隔（毫秒），None表示不修正
+            expected_intervals: 按端点名指定的期望请求间隔（毫秒），优先于默认值
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self.expected_interval_ms = expected_interval_ms
+        self.expected_intervals = expected_intervals or {}
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.start_time = time.time()
+        self._buffer: List[str] = []
+        self._file = open(path, 'w', encoding='utf-8') if path else None
+
+    def record(self, method: str, endpoint: str, status: int, latency_ms: float,
+               ok: bool, message: Optional[str] = None) -> None:
+        """
+        记录一次请求
+
+        Args:
+            method: HTTP方法
+            endpoint: 端点名称或API端点路径（路径按 endpoint_name 归一化）
+            status: HTTP状态码，网络异常时为0
+            latency_ms: 请求耗时（毫秒）
+            ok: 请求是否成功（HTTP 200且业务成功）
+            message: 失败时的错误信息
+        """
+        name = endpoint_name(endpoint)
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = EndpointStats()
+        now = time.time()
+        stats.histogram.record(latency_ms)
+        interval = self.expected_intervals.get(name, self.expected_interval_ms)
+        if interval:
+            if stats.corrected is None:
+                stats.corrected = LatencyHistogram()
+            stats.corrected.record_with_expected_interval(latency_ms, interval)
+        if not stats.count:
+            stats.first_t = now
+        stats.last_t = now
+        stats.count += 1
+        if not ok:
+            stats.errors += 1
+
+        if self._file is not None:
+            row = {'t': round(now, 3), 'ep': name, 'm': method, 's': status,
+                   'ms': round(latency_ms, 3), 'ok': 1 if ok else 0}
+            if not ok and message:
+                row['msg'] = str(message)
+            self._buffer.append(json.dumps(row, ensure_ascii=False))
+            if len(self._buffer) >= self.flush_every:
+                self.flush()
+
+    def flush(self) -> None:
+        """将缓冲的记录写入文件"""
+        if self._buffer and self._file is not None:
+            self._file.write('\n'.join(self._buffer) + '\n')
+            self._buffer = []
+
+    def close(self) -> None:
+        """写入剩余记录并关闭文件"""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def summary(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        汇总每个端点的统计
+
+        Returns:
+            List[Tuple[str, Dict]]: (端点名, 统计字典)，按请求数降序
+        """
+        rows = []
+        for name, stats in self.endpoints.items():
+            hist = stats.histogram
+            rows.append((name, {
+                'count': stats.count,
+                'errors': stats.errors,
+                'error_rate': stats.errors / stats.count if stats.count else 0.0,
+                'throughput': stats.throughput,
+                'mean': hist.mean,
+                'p50': hist.percentile(50),
+                'p95': hist.percentile(95),
+                'p99': hist.percentile(99),
+                'max': hist.max,
+                # 修正协调遗漏后的分位数，未配置期望间隔时为None
+                'p95_corrected': stats.corrected.percentile(95) if stats.corrected else None,
+                'p99_corrected': stats.corrected.percentile(99) if stats.corrected else None,
+            }))
+        rows.sort(key=lambda item: item[1]['count'], reverse=True)
+        return rows
@@ -0,0 +1,196 @@
+from __future__ import annotations
+import json
+import random
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple, Union, TYPE_CHECKING
+
+from transport import Transport
+if TYPE_CHECKING:
+    import aiohttp
+
+
+@dataclass(frozen=True)
+class NetworkProfile:
+    """虚拟用户所处的网络条件"""
+    name: str                 # 名称，用于日志
+    rtt_ms: float = 0.0       # 额外往返时延（毫秒）
+    jitter_ms: float = 0.0    # 往返时延的随机抖动幅度（毫秒）
+    up_kbps: float = 0.0      # 上行带宽（KB/s），0表示不限速
+    down_kbps: float = 0.0    # 下行带宽（KB/s），0表示不限速
+    drop_rate: float = 0.0    # 每个请求发生连接中断的概率
+
+    @property
+    def is_noop(self) -> bool:
+        """是否不做任何模拟"""
+        return not (self.rtt_ms or self.jitter_ms or self.up_kbps or self.down_kbps or self.drop_rate)
+
+
+# 预置的网络条件，带宽单位为 KB/s
+PROFILES: Dict[str, NetworkProfile] = {
+    'lan': NetworkProfile('lan'),
+    'school-lab': NetworkProfile('school-lab', rtt_ms=30, jitter_ms=10, up_kbps=256, down_kbps=512),
+    'wifi': NetworkProfile('wifi', rtt_ms=40, jitter_ms=20, up_kbps=1024, down_kbps=2048, drop_rate=0.001),
+    '4g': NetworkProfile('4g', rtt_ms=80, jitter_ms=40, up_kbps=512, down_kbps=1536, drop_rate=0.005),
+    '3g': NetworkProfile('3g', rtt_ms=200, jitter_ms=80, up_kbps=48, down_kbps=128, drop_rate=0.01),
+    'poor': NetworkProfile('poor', rtt_ms=500, jitter_ms=250, up_kbps=8, down_kbps=16, drop_rate=0.05),
+}
+
+# 参数名 -> NetworkProfile 字段名
+_SPEC_FIELDS = {'rtt': 'rtt_ms', 'jitter': 'jitter_ms', 'up': 'up_kbps',
+                'down': 'down_kbps', 'drop': 'drop_rate'}
+
+
+def parse_profile(text: str) -> NetworkProfile:
+    """
+    解析网络条件
+
+    Args:
+        text: 预置名称（见 PROFILES），或形如 "rtt=80,jitter=20,up=256,down=1024,drop=0.01" 的自定义参数
+
+    Returns:
+        NetworkProfile: 网络条件
+
+    Raises:
+        ValueError: 名称未知或参数格式错误
+    """
+    text = text.strip()
+    if text in PROFILES:
+        return PROFILES[text]
+    if '=' not in text:
+        raise ValueError(f"未知的网络条件: {text!r}，可选: {', '.join(PROFILES)}")
+    values = {}
+    for item in text.split(','):
+        key, _, value = item.partition('=')
+        field_name = _SPEC_FIELDS.get(key.strip())
+        if field_name is None:
+            raise ValueError(f"网络条件参数无效: {item!r}，可用参数: {', '.join(_SPEC_FIELDS)}")
+        values[field_name] = float(value)
+    return NetworkProfile(text, **values)
+
+
+class ProfileAssigner:
+    """按权重为虚拟用户分配网络条件，同一种子下分配结果可复现"""
+
+    def __init__(self, profiles: Dict[str, float], seed: Optional[int] = None):
+        """
+        Args:
+            profiles: 网络条件 -> 权重，如 {'4g': 0.6, 'school-lab': 0.4}
+            seed: 随机种子
+        """
+        self.profiles = [parse_profile(text) for text in profiles]
+        self.weights = list(profiles.values())
+        self.rng = random.Random(seed)
+
+    def assign(self) -> NetworkProfile:
+        """为下一个虚拟用户抽取网络条件"""
+        return self.rng.choices(self.profiles, self.weights)[0]
+
+
+class EmulatedTransport(Transport):
+    """
+    单个虚拟用户的网络条件模拟，包装共享的会话或传输层，纯进程内实现，不需要root或tc
+
+    底层为aiohttp会话时在连接上模拟：请求体按上行带宽分块慢速写出，慢速上传会像真实网络一样
+    长时间占用服务端连接；响应体按下行带宽从aiohttp的接收缓冲区慢速读取，较小的响应在读取前
+    已经完整到达，下行限速只增加客户端看到的耗时，不会拖住服务端连接。
+    连接中断在发送前决定：有请求体时在请求体完整写出后断开，服务端收到完整请求后看到客户端中止；
+    没有请求体时请求不会发出，服务端只看到连接被关闭。两种情况下aiohttp都会关闭该连接，不放回连接池
+    （aiohttp在响应读完时就把连接放回连接池，小响应无法在收到后再中止，所以不在响应阶段断开）。
+    底层为其他传输层时只按报文大小推算并等待相应时间；
+    连接由所有用户复用，连接中断时请求照常发出、服务端照常处理，只是客户端丢弃响应并报错，
+    服务端看不到连接中止
+    """
+
+    def __init__(self, inner: Union[aiohttp.ClientSession, Transport], profile: NetworkProfile,
+                 rng: Optional[random.Random] = None):
+        """
+        Args:
+            inner: 所有用户共享的aiohttp会话或传输层，不由本对象关闭
+            profile: 网络条件
+            rng: 随机数发生器（抖动和连接中断）
+        """
+        self.inner = inner
+        self.profile = profile
+        self.rng = rng or random
+
+    def _half_rtt(self) -> float:
+        """单程时延（秒），含随机抖动"""
+        rtt = self.profile.rtt_ms + self.rng.uniform(-self.profile.jitter_ms, self.profile.jitter_ms)
+        return max(0.0, rtt) / 2000
+
+    def _dropped(self) -> bool:
+        """本次请求是否发生连接中断"""
+        return self.profile.drop_rate > 0 and self.rng.random() < self.profile.drop_rate
+
+    @staticmethod
+    def _transfer_time(size: int, kbps: float) -> float:
+        """按带宽传输size字节所需时间（秒）"""
+        return size / (kbps * 1024) if kbps else 0.0
+
+    async def _paced_body(self, body: bytes):
+        """按上行带宽分块产出请求体"""
+        rate = self.profile.up_kbps * 1024
+        chunk_size = max(512, int(rate / 20))
+        for offset in range(0, len(body), chunk_size):
+            chunk = body[offset:offset + chunk_size]
+            await asyncio.sleep(len(chunk) / rate)
+            yield chunk
+
+    @staticmethod
+    async def _dropping_body(body):
+        """产出完整请求体后抛出异常，aiohttp因请求体写出失败而关闭该连接"""
+        if isinstance(body, bytes):
+            if body:
+                yield body
+        else:
+            async for chunk in body:
+                yield chunk
+        raise ConnectionResetError("模拟连接中断")
+
+    async def _aiohttp_request(self, method: str, url: str, headers: Dict[str, str],
+                               data: Optional[Dict]) -> Tuple[int, Dict[str, Any]]:
+        """在aiohttp连接上模拟带宽、时延和连接中断"""
+        body = None
+        if data is not None:
+            payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            headers = {**headers, 'Content-Type': 'application/json', 'Content-Length': str(len(payload))}
+            body = self._paced_body(payload) if self.profile.up_kbps else payload
+        dropped = self._dropped()
+        if dropped:
+            body = self._dropping_body(body if body is not None else b'')
+
+        await asyncio.sleep(self._half_rtt())
+        try:
+            async with self.inner.request(method, url, headers=headers, data=body) as response:
+                await asyncio.sleep(self._half_rtt())
+                status = response.status
+                if self.profile.down_kbps:
+                    rate = self.profile.down_kbps * 1024
+                    chunks = []
+                    async for chunk in response.content.iter_chunked(max(512, int(rate / 20))):
+                        await asyncio.sleep(len(chunk) / rate)
+                        chunks.append(chunk)
+                    raw = b''.join(chunks)
+                else:
+                    raw = await response.read()
+        except Exception as e:
+            if dropped:
+                raise ConnectionResetError("模拟连接中断") from e
+            raise
+        # 与 aiohttp_request 一致，只有状态码为200时才解析JSON响应
+        return status, json.loads(raw) if status == 200 and raw else {}
+
+    async def request(self, method, url, headers, data):
+        if not isinstance(self.inner, Transport):
+            return await self._aiohttp_request(method, url, headers, data)
+
+        size = len(json.dumps(data, ensure_ascii=False).encode('utf-8')) if data is not None else 0
+        await asyncio.sleep(self._half_rtt() + self._transfer_time(size, self.profile.up_kbps))
+        status, response_data = await self.inner.request(method, url, headers, data)
+        # 与aiohttp路径一致，在请求发出后、响应读完前中断
+        if self._dropped():
+            raise ConnectionResetError("模拟连接中断")
+        size = len(json.dumps(response_data, ensure_ascii=False).encode('utf-8')) if self.profile.down_kbps else 0
+        await asyncio.sleep(self._half_rtt() + self._transfer_time(size, self.profile.down_kbps))
+        return status, response_data
@@ -0,0 +1,218 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional, List, Tuple
+
+from metrics import LatencyHistogram
+
+
+@dataclass
+class GeneratorHealth:
+    """压测机自身的健康状况"""
+    healthy: bool                      # 压测机是否健康（结果是否可信）
+    loop_lag_p99: float                # 事件循环延迟p99（毫秒）
+    loop_lag_max: float                # 事件循环最大延迟（毫秒）
+    cpu_percent: float                 # 运行期间平均CPU占用（占单核百分比）
+    cpu_peak: float                    # 采样周期内的CPU占用峰值
+    reasons: List[str] = field(default_factory=list)            # 判定为不健康的原因
+    hot_frames: List[Tuple[str, int]] = field(default_factory=list)  # 采样到的最热调用栈（栈顶在前）
+    idle_ratio: Optional[float] = None  # 栈采样中事件循环空闲（等待IO）的比例，未开启栈采样时为None
+    profile_path: Optional[str] = None  # 时间窗口剖析结果文件
+
+
+class GeneratorProfiler:
+    """
+    压测机自身的低开销剖析
+
+    - 事件循环延迟：后台协程按固定间隔休眠，记录实际唤醒比预期晚了多少；
+    - CPU占用：按采样周期比较进程CPU时间与墙钟时间（Python单线程事件循环上限约为100%）；
+    - 栈采样（可选）：后台线程定期抓取事件循环线程的调用栈，按整条栈（栈顶向下若干层）统计最热的调用路径，
+      栈顶为事件循环等待IO（selectors）的样本只计为空闲，不参与热点统计；
+    - 时间窗口剖析（可选）：在运行开始后的指定时间段内开启cProfile（安装了yappi时使用yappi）。
+    运行结束后给出“压测机是否健康”的结论，不健康时压测结果中的延迟包含压测机自身的排队时间
+    """
+
+    def __init__(self, interval: float = 0.1, lag_threshold_ms: float = 50.0,
+                 cpu_threshold: float = 90.0, sample_stacks: bool = False,
+                 stack_interval: float = 0.01, stack_depth: int = 6,
+                 profile_start: Optional[float] = None,
+                 profile_duration: float = 10.0, profile_path: str = 'generator.prof'):
+        """
+        初始化剖析器
+
+        Args:
+            interval: 事件循环延迟和CPU占用的采样周期（秒）
+            lag_threshold_ms: 事件循环延迟p99超过该值判定为压测机饱和（毫秒）
+            cpu_threshold: 平均CPU占用超过该百分比判定为压测机饱和
+            sample_stacks: 是否开启栈采样
+            stack_interval: 栈采样间隔（秒）
+            stack_depth: 每个样本从栈顶向下记录的帧数
+            profile_start: 运行开始后多少秒开启函数级剖析，None表示不剖析
+            profile_duration: 函数级剖析持续时间（秒）
+            profile_path: 剖析结果输出路径
+        """
+        self.interval = interval
+        self.lag_threshold_ms = lag_threshold_ms
+        self.cpu_threshold = cpu_threshold
+        self.sample_stacks = sample_stacks
+        self.stack_interval = stack_interval
+        self.stack_depth = stack_depth
+        self.profile_start = profile_start
+        self.profile_duration = profile_duration
+        self.profile_path = profile_path
+
+        self.lag = LatencyHistogram()
+        self.cpu_samples: List[float] = []
+        self.stacks: Counter = Counter()   # 调用栈 -> 样本数，栈为 ((文件, 函数, 行号), ...)，栈顶在前
+        self.idle_samples = 0
+        self._cpu_start = 0.0
+        self._wall_start = 0.0
+        self._tasks: List[asyncio.Task] = []
+        self._stack_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._profile_written = False
+        self.logger = logging.getLogger('GeneratorProfiler')
+
+    async def _measure_loop(self) -> None:
+        """测量事件循环延迟和CPU占用"""
+        last_cpu = time.process_time()
+        last_wall = time.perf_counter()
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self.lag.record(max(0.0, (now - expected) * 1000))
+
+            cpu = time.process_time()
+            self.cpu_samples.append((cpu - last_cpu) / (now - last_wall) * 100)
+            last_cpu, last_wall = cpu, now
+
+    def _sample_stacks(self) -> None:
+        """后台线程：定期抓取事件循环线程的调用栈"""
+        while not self._stop_event.wait(self.stack_interval):
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            # 栈顶在selectors中说明事件循环正在等待IO，只计为空闲
+            if os.path.basename(frame.f_code.co_filename) == 'selectors.py':
+                self.idle_samples += 1
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.stack_depth:
+                stack.append((frame.f_code.co_filename, frame.f_code.co_name, frame.f_lineno))
+                frame = frame.f_back
+            self.stacks[tuple(stack)] += 1
+
+    async def _profile_window(self) -> None:
+        """在指定时间窗口内开启函数级剖析"""
+        # 剖析模块只在开启剖析窗口时导入，不拖慢压测进程启动
+        try:
+            import yappi
+        except ImportError:  # yappi为可选依赖，未安装时使用cProfile
+            yappi = None
+        import cProfile
+        await asyncio.sleep(self.profile_start)
+        self.logger.info(f"开始函数级剖析，持续 {self.profile_duration:g} 秒")
+        if yappi is not None:
+            yappi.set_clock_type('cpu')
+            yappi.start()
+            try:
+                await asyncio.sleep(self.profile_duration)
+            finally:
+                yappi.stop()
+                yappi.get_func_stats().save(self.profile_path, type='pstat')
+                yappi.clear_stats()
+                self._profile_written = True
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await asyncio.sleep(self.profile_duration)
+            finally:
+                profiler.disable()
+                profiler.dump_stats(self.profile_path)
+                self._profile_written = True
+        self.logger.info(f"剖析结果已写入: {self.profile_path}（可用 python -m pstats 查看）")
+
+    def start(self) -> None:
+        """在当前事件循环中启动剖析"""
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        self._tasks.append(asyncio.create_task(self._measure_loop()))
+        if self.profile_start is not None:
+            self._tasks.append(asyncio.create_task(self._profile_window()))
+        if self.sample_stacks:
+            self._loop_thread_id = threading.get_ident()
+            self._stop_event.clear()
+            self._stack_thread = threading.Thread(target=self._sample_stacks,
+                                                  name='StackSampler', daemon=True)
+            self._stack_thread.start()
+
+    async def stop(self) -> GeneratorHealth:
+        """
+        停止剖析并给出健康结论
+
+        Returns:
+            GeneratorHealth: 压测机健康状况
+        """
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self._stack_thread is not None:
+            self._stop_event.set()
+            self._stack_thread.join()
+            self._stack_thread = None
+
+        wall = time.perf_counter() - self._wall_start
+        cpu_percent = (time.process_time() - self._cpu_start) / wall * 100 if wall > 0 else 0.0
+        lag_p99 = self.lag.percentile(99)
+
+        reasons = []
+        if lag_p99 > self.lag_threshold_ms:
+            reasons.append(f"事件循环延迟p99 {lag_p99:.1f}ms 超过 {self.lag_threshold_ms:g}ms")
+        if cpu_percent > self.cpu_threshold:
+            reasons.append(f"平均CPU占用 {cpu_percent:.1f}% 超过 {self.cpu_threshold:g}%")
+
+        samples = self.idle_samples + sum(self.stacks.values())
+        return GeneratorHealth(
+            healthy=not reasons,
+            loop_lag_p99=lag_p99,
+            loop_lag_max=self.lag.max,
+            cpu_percent=cpu_percent,
+            cpu_peak=max(self.cpu_samples, default=0.0),
+            reasons=reasons,
+            hot_frames=[(" <- ".join(f"{os.path.basename(filename)}:{name}:{line}"
+                                     for filename, name, line in stack), count)
+                        for stack, count in self.stacks.most_common(10)],
+            idle_ratio=self.idle_samples / samples if samples else None,
+            profile_path=self.profile_path if self._profile_written else None
+        )
+
+
+def top_functions(profile_path: str, limit: int = 10) -> List[str]:
+    """
+    读取剖析结果中累计耗时最高的函数
+
+    Args:
+        profile_path: 剖析结果文件
+        limit: 返回的函数数量
+
+    Returns:
+        List[str]: 每行一个函数的描述
+    """
+    import pstats
+    stats = pstats.Stats(profile_path)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [f"{os.path.basename(filename)}:{line}({name}) 累计 {cumtime * 1000:.1f}ms，调用 {calls} 次"
+            for (filename, line, name), (_, calls, _, cumtime, _) in rows]
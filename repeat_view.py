@@ -0,0 +1,141 @@
+from __future__ import annotations
+import random
+import asyncio
+import logging
+from typing import List, Optional, Set, Tuple, Union, TYPE_CHECKING
+
+from scale_service import ScaleService
+from transport import Transport
+from virtual_user import VirtualUser
+if TYPE_CHECKING:
+    import aiohttp
+
+
+class ReportIndex:
+    """
+    已生成报告的索引
+
+    记录本次运行中已经成功查看过报告的 (任务, 学生, 问卷) 组合，
+    重复查看只从索引中抽取，不会请求不存在的报告
+    """
+
+    def __init__(self):
+        self._keys: Set[Tuple[str, str, str]] = set()
+        self._entries: List[Tuple[VirtualUser, str, Optional[Union[aiohttp.ClientSession, Transport]]]] = []
+
+    def add(self, user: VirtualUser, scale_id: str,
+            session: Optional[Union[aiohttp.ClientSession, Transport]] = None) -> None:
+        """
+        登记一份已存在的报告
+
+        Args:
+            user: 已登录并获取任务的虚拟用户（重复查看时使用其token）
+            scale_id: 问卷ID
+            session: 该用户首次查看时使用的会话或传输层，重复查看经过同样的网络条件模拟和轨迹录制
+        """
+        key = (str(user.task_id), str(user.user_id), str(scale_id))
+        if key not in self._keys:
+            self._keys.add(key)
+            self._entries.append((user, scale_id, session))
+
+    def sample(self, rng: random.Random
+               ) -> Tuple[VirtualUser, str, Optional[Union[aiohttp.ClientSession, Transport]]]:
+        """随机抽取一份报告"""
+        return rng.choice(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RepeatViewWorkload:
+    """
+    报告重复查看负载
+
+    与学生答题流程并行，按固定速率从索引中随机抽取已生成的报告再次请求，
+    模拟学生和心理老师反复打开同一份报告。按计划时间发出请求，不等待前一个请求返回，
+    在途请求达到上限时跳过本次并计数，避免压测机自身排队。
+    重复查看的延迟单独记为 getReportUserInfo#repeat，与首次查看对比可判断报告生成是否需要服务端缓存
+    """
+
+    def __init__(self, scale_service: ScaleService, index: ReportIndex,
+                 session: Union[aiohttp.ClientSession, Transport], rate: float,
+                 max_in_flight: int = 1000, seed: Optional[int] = None):
+        """
+        初始化重复查看负载
+
+        Args:
+            scale_service: 问卷服务
+            index: 报告索引
+            session: 共享的aiohttp会话对象或传输层，索引中未登记会话的报告使用它查看
+            rate: 每秒重复查看次数
+            max_in_flight: 在途重复查看请求上限
+            seed: 抽取报告的随机种子
+        """
+        self.scale_service = scale_service
+        self.index = index
+        self.session = session
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self.rng = random.Random(seed)
+        self.issued = 0     # 已发出的请求数
+        self.failed = 0     # 失败（含网络异常）的请求数
+        self.skipped = 0    # 因在途请求达到上限而跳过的次数
+        self._in_flight: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.logger = logging.getLogger('RepeatViewWorkload')
+
+    async def _view(self, user: VirtualUser, scale_id: str,
+                    session: Optional[Union[aiohttp.ClientSession, Transport]]) -> None:
+        """重复查看一份报告"""
+        try:
+            if not await self.scale_service.get_report(session or self.session, user, scale_id, repeat=True):
+                self.failed += 1
+        except Exception:
+            self.failed += 1
+
+    async def _run(self) -> None:
+        """按固定速率发出重复查看请求"""
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.rate
+        next_time = loop.time()
+        while True:
+            now = loop.time()
+            # 计划时间已到的请求全部发出，高速率下一次唤醒可发出多个
+            while next_time <= now:
+                next_time += interval
+                if not self.index:
+                    continue
+                if len(self._in_flight) >= self.max_in_flight:
+                    self.skipped += 1
+                    continue
+                user, scale_id, session = self.index.sample(self.rng)
+                task = asyncio.create_task(self._view(user, scale_id, session))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+                self.issued += 1
+            await asyncio.sleep(next_time - loop.time())
+
+    def start(self) -> None:
+        """在当前事件循环中开始重复查看"""
+        self.logger.info(f"开始报告重复查看负载: {self.rate:g} 次/秒")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, tail: float = 0.0) -> None:
+        """
+        停止重复查看，并等待在途请求完成
+
+        Args:
+            tail: 停止前继续运行的时间（秒），用于在答题流程结束后单独测量重复查看
+        """
+        if self._task is None:
+            return
+        if tail > 0:
+            await asyncio.sleep(tail)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
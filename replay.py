@@ -0,0 +1,362 @@
+from __future__ import annotations
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from urllib.parse import urlsplit
+from typing import Dict, Any, Optional, List, Iterator, Union, TextIO, TYPE_CHECKING
+
+from api_client import APIClient
+from metrics import MetricsRecorder, LatencyHistogram, endpoint_name
+from transport import TRANSPORTS, Transport, HttpxTransport, PipelinedHTTP1Transport, aiohttp_request
+if TYPE_CHECKING:
+    import aiohttp
+
+# nginx默认的combined日志格式：
+# $remote_addr - $remote_user [$time_local] "$request" $status $body_bytes_sent "$http_referer" "$http_user_agent"
+NGINX_LINE = re.compile(
+    r'(?P<ip>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+)[^"]*" '
+    r'(?P<status>\d{3}) \S+(?: "[^"]*" "(?P<ua>[^"]*)")?'
+)
+NGINX_TIME_FORMAT = '%d/%b/%Y:%H:%M:%S %z'
+
+
+def open_trace(path: str, mode: str = 'rt') -> TextIO:
+    """打开轨迹文件，.gz结尾的文件按gzip压缩读写"""
+    if path.endswith('.gz'):
+        import gzip
+        return gzip.open(path, mode, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def read_trace(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    逐条读取轨迹
+
+    Args:
+        path: 轨迹文件路径
+
+    Yields:
+        Dict: 一个请求，键为 t（相对开始的秒数）、u（用户）、m、ep、h（请求头，可缺省）、b（请求体，可缺省）
+    """
+    with open_trace(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class TraceWriter:
+    """
+    请求轨迹记录器
+
+    以gzip压缩的JSONL记录每个请求的发出时间、用户、方法、路径、请求头和请求体，
+    同一用户的请求按发出顺序排列，相邻请求的时间差即为到达间隔
+    """
+
+    def __init__(self, path: str, flush_every: int = 1000):
+        """
+        初始化轨迹记录器
+
+        Args:
+            path: 轨迹文件路径（建议以 .gz 结尾）
+            flush_every: 缓冲多少条后写入文件
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self.file = open_trace(path, 'wt')
+        self.start = time.perf_counter()
+        self.count = 0
+        self._buffer: List[str] = []
+
+    def record(self, user: str, method: str, url: str, headers: Optional[Dict[str, str]],
+               data: Optional[Dict]) -> None:
+        """
+        记录一个请求
+
+        Args:
+            user: 用户标识
+            method: HTTP方法
+            url: 完整URL，只记录路径和查询参数，回放时可换成其他目标
+            headers: 请求头
+            data: 请求体数据
+        """
+        parts = urlsplit(url)
+        entry = {
+            't': round(time.perf_counter() - self.start, 6),
+            'u': user,
+            'm': method,
+            'ep': f"{parts.path}?{parts.query}" if parts.query else parts.path,
+        }
+        if headers:
+            entry['h'] = headers
+        if data is not None:
+            entry['b'] = data
+        self._buffer.append(json.dumps(entry, ensure_ascii=False, separators=(',', ':')))
+        self.count += 1
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """把缓冲的记录写入文件"""
+        if self._buffer:
+            self.file.write('\n'.join(self._buffer) + '\n')
+            self._buffer = []
+
+    def close(self) -> None:
+        """写出剩余记录并关闭文件"""
+        self.flush()
+        self.file.close()
+
+
+class RecordingTransport(Transport):
+    """单个虚拟用户的轨迹记录，包装共享的会话或传输层，记录后原样转发请求"""
+
+    def __init__(self, inner: Union[aiohttp.ClientSession, Transport], writer: TraceWriter, user: str):
+        """
+        Args:
+            inner: 实际发送请求的会话或传输层，不由本对象关闭
+            writer: 共享的轨迹记录器
+            user: 用户标识
+        """
+        self.inner = inner
+        self.writer = writer
+        self.user = user
+
+    async def request(self, method, url, headers, data):
+        self.writer.record(self.user, method, url, headers, data)
+        if isinstance(self.inner, Transport):
+            return await self.inner.request(method, url, headers, data)
+        return await aiohttp_request(self.inner, method, url, headers, data)
+
+
+class ReplayClient(APIClient):
+    """按轨迹发送单个请求，每个用户登录后用新token替换轨迹中的旧token"""
+
+    async def replay(self, session: Union[aiohttp.ClientSession, Transport], entry: Dict[str, Any],
+                     token: Optional[str]) -> Optional[str]:
+        """
+        发送轨迹中的一个请求
+
+        Args:
+            session: aiohttp会话对象或传输层
+            entry: 轨迹记录
+            token: 该用户本次回放中登录得到的token
+
+        Returns:
+            Optional[str]: 该用户之后应使用的token
+        """
+        headers = entry.get('h') or {}
+        if token and 'Authorization' in headers:
+            headers = {**headers, 'Authorization': f'Bearer {token}'}
+        status, data = await self._make_request(session, entry['m'], entry['ep'], headers, entry.get('b'))
+        if status == 200 and data.get('success') and endpoint_name(entry['ep']) == 'clientLogin':
+            token = (data.get('result') or {}).get('token', token)
+        return token
+
+
+class TraceReplayer:
+    """
+    轨迹回放
+
+    后台线程负责解压和解析轨迹文件，分批交给事件循环，文件读取不阻塞请求发送；
+    调度协程按 t / speed 的时间点把请求分发到各用户的队列，每个用户的请求严格按轨迹顺序逐个发出，
+    上一个请求未返回时下一个请求顺延，顺延的时间记为调度滞后
+    """
+
+    def __init__(self, target: str, session: Union[aiohttp.ClientSession, Transport],
+                 speed: float = 1.0, recorder: Optional[MetricsRecorder] = None,
+                 batch_size: int = 1000, max_batches: int = 8):
+        """
+        初始化轨迹回放
+
+        Args:
+            target: 回放目标的基础URL
+            session: aiohttp会话对象或传输层
+            speed: 回放速度倍数，2表示两倍速
+            recorder: 可选的指标记录器，与压测使用相同的统计方式
+            batch_size: 后台线程每批解析的记录数
+            max_batches: 等待发送的批次上限，超过时后台线程暂停读取
+        """
+        self.client = ReplayClient(target.rstrip('/'), recorder=recorder)
+        self.session = session
+        self.speed = speed
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.lag = LatencyHistogram()   # 实际发出时间相对计划时间的滞后（毫秒）
+        self.sent = 0
+        self.failed = 0
+
+    def _read_batches(self, path: str, loop: asyncio.AbstractEventLoop, batches: asyncio.Queue) -> None:
+        """后台线程：分批读取轨迹并放入队列，结束时放入None，出错时放入异常"""
+        def put(item):
+            asyncio.run_coroutine_threadsafe(batches.put(item), loop).result()
+
+        try:
+            batch = []
+            for entry in read_trace(path):
+                batch.append(entry)
+                if len(batch) >= self.batch_size:
+                    put(batch)
+                    batch = []
+            if batch:
+                put(batch)
+            put(None)
+        except Exception as e:
+            put(e)
+
+    async def _user_lane(self, lane: asyncio.Queue) -> None:
+        """按顺序发送单个用户的请求"""
+        loop = asyncio.get_running_loop()
+        token = None
+        while True:
+            item = await lane.get()
+            if item is None:
+                return
+            due, entry = item
+            self.lag.record(max(0.0, loop.time() - due) * 1000)
+            try:
+                token = await self.client.replay(self.session, entry, token)
+                self.sent += 1
+            except Exception:
+                self.failed += 1
+
+    async def run(self, path: str) -> None:
+        """
+        回放轨迹文件
+
+        Args:
+            path: 轨迹文件路径
+        """
+        loop = asyncio.get_running_loop()
+        batches: asyncio.Queue = asyncio.Queue(self.max_batches)
+        reader = threading.Thread(target=self._read_batches, args=(path, loop, batches),
+                                  name='TraceReader', daemon=True)
+        reader.start()
+
+        lanes: Dict[str, asyncio.Queue] = {}
+        tasks: List[asyncio.Task] = []
+        start = loop.time()
+        try:
+            while True:
+                batch = await batches.get()
+                if batch is None:
+                    break
+                if isinstance(batch, Exception):
+                    raise batch
+                for entry in batch:
+                    due = start + entry['t'] / self.speed
+                    delay = due - loop.time()
+                    if delay > 0.001:
+                        await asyncio.sleep(delay)
+                    lane = lanes.get(entry['u'])
+                    if lane is None:
+                        lane = lanes[entry['u']] = asyncio.Queue()
+                        tasks.append(asyncio.create_task(self._user_lane(lane)))
+                    lane.put_nowait((due, entry))
+            for lane in lanes.values():
+                lane.put_nowait(None)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        reader.join()
+
+
+def import_nginx(log_path: str, output: str, prefix: str = '/jeecg-boot/api/') -> int:
+    """
+    把nginx访问日志转换为轨迹
+
+    访问日志只有秒级时间戳且不含请求体，同一秒内的请求会同时回放，POST请求以空请求体回放。
+    用户按客户端IP和User-Agent区分（同一NAT出口后的学生可能被合并为一个用户）
+
+    Args:
+        log_path: 访问日志路径（combined格式，.gz结尾时按gzip读取）
+        output: 输出的轨迹文件路径
+        prefix: 只保留以该前缀开头的请求路径
+
+    Returns:
+        int: 导入的请求数
+    """
+    from datetime import datetime
+    count = 0
+    first = None
+    with open_trace(log_path) as f, open_trace(output, 'wt') as out:
+        for line in f:
+            match = NGINX_LINE.match(line)
+            if not match or not match['path'].startswith(prefix):
+                continue
+            timestamp = datetime.strptime(match['time'], NGINX_TIME_FORMAT).timestamp()
+            if first is None:
+                first = timestamp
+            user = match['ip'] if not match['ua'] else f"{match['ip']} {match['ua']}"
+            entry = {'t': max(0.0, timestamp - first), 'u': user, 'm': match['method'], 'ep': match['path']}
+            out.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+            count += 1
+    return count
+
+
+def create_session(transport: str, target: str, connections: int) -> Union[aiohttp.ClientSession, Transport]:
+    """按名称创建回放使用的会话或传输层"""
+    if transport == 'httpx-h2':
+        return HttpxTransport(http2=True, max_connections=connections)
+    if transport == 'http1-pipeline':
+        return PipelinedHTTP1Transport(target, connections=connections)
+    import aiohttp
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=connections))
+
+
+async def replay_trace(args: argparse.Namespace) -> int:
+    """执行回放并输出各端点统计"""
+    recorder = MetricsRecorder(args.record)
+    session = create_session(args.transport, args.target, args.connections)
+    replayer = TraceReplayer(args.target, session, args.speed, recorder)
+    started = time.perf_counter()
+    try:
+        await replayer.run(args.trace)
+    finally:
+        await session.close()
+        recorder.close()
+    elapsed = time.perf_counter() - started
+
+    print(f"回放完成: {replayer.sent} 个请求，网络异常 {replayer.failed} 个，耗时 {elapsed:.2f}秒（{args.speed:g}倍速）")
+    print(f"调度滞后 p99: {replayer.lag.percentile(99):.1f}ms  最大: {replayer.lag.max:.1f}ms")
+    for name, stats in recorder.summary():
+        print(f"[{name}] 请求: {stats['count']}  错误率: {stats['error_rate'] * 100:.2f}%  "
+              f"p50: {stats['p50']:.1f}ms  p95: {stats['p95']:.1f}ms  p99: {stats['p99']:.1f}ms")
+    if args.record:
+        print(f"逐请求记录已写入: {args.record}，可用 analyze.py 与其他版本对比")
+    return 0
+
+
+def main() -> int:
+    """命令行入口：回放轨迹，或从nginx访问日志导入轨迹"""
+    parser = argparse.ArgumentParser(description="请求轨迹回放工具")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help="按轨迹回放请求")
+    run.add_argument('trace', help="轨迹文件（test.py --trace 录制或 import-nginx 导入）")
+    run.add_argument('--target', required=True, help="回放目标的基础URL，如 http://localhost:8999/")
+    run.add_argument('--speed', type=float, default=1.0, help="回放速度倍数，如 1、2、10")
+    run.add_argument('--transport', default='aiohttp', choices=TRANSPORTS, help="传输层")
+    run.add_argument('--connections', type=int, default=1000, help="最大连接数")
+    run.add_argument('--record', default=None, help="逐请求记录的JSONL输出路径，供 analyze.py 分析")
+
+    nginx = sub.add_parser('import-nginx', help="从nginx访问日志导入轨迹")
+    nginx.add_argument('log', help="nginx访问日志（combined格式）")
+    nginx.add_argument('output', help="输出的轨迹文件（建议以 .gz 结尾）")
+    nginx.add_argument('--prefix', default='/jeecg-boot/api/', help="只导入以该前缀开头的请求")
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        return asyncio.run(replay_trace(args))
+    count = import_nginx(args.log, args.output, args.prefix)
+    print(f"已导入 {count} 个请求: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
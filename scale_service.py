@@ -1,16 +1,24 @@
-import aiohttp
+from __future__ import annotations
 import random
-from typing import List, Dict, Any
+from typing import List, Dict, Any, TYPE_CHECKING
 from api_client import APIClient
+from virtual_user import VirtualUser
+if TYPE_CHECKING:
+    import aiohttp
+
+# 重复查看报告时使用的指标名称，与首次查看分开统计
+REPEAT_VIEW_METRIC = 'getReportUserInfo#repeat'
 
 class ScaleService(APIClient):
     """
     问卷服务类
     
-    负责问卷相关的操作，包括生成随机答案、提交答案和获取测评报告
+    负责问卷相关的操作，包括生成随机答案、提交答案和获取测评报告。
+    服务本身不保存用户状态，同一实例可被所有用户共享
     """
     
-    def __init__(self, base_url: str, auth_service, task_service, debug: bool = True):
+    def __init__(self, base_url: str, auth_service, task_service, debug: bool = True,
+                 recorder=None, validator=None):
         """
         初始化问卷服务
         
@@ -19,8 +27,10 @@ class ScaleService(APIClient):
             auth_service: 认证服务实例
             task_service: 任务服务实例
             debug: 是否开启调试模式
+            recorder: 可选的指标记录器
+            validator: 可选的响应校验器
         """
-        super().__init__(base_url, debug)
+        super().__init__(base_url, debug, recorder, validator)
         self.auth_service = auth_service
         self.task_service = task_service
     
@@ -49,13 +59,14 @@ class ScaleService(APIClient):
             })
         return answers
     
-    async def submit_scale_answers(self, session: aiohttp.ClientSession, 
+    async def submit_scale_answers(self, session: aiohttp.ClientSession, user: VirtualUser,
                                  scale_id: str, answers: List[Dict[str, Any]]) -> bool:
         """
         提交问卷答案
         
         Args:
             session: aiohttp会话对象
+            user: 已获取任务的虚拟用户
             scale_id: 问卷ID
             answers: 答案列表
             
@@ -64,19 +75,19 @@ class ScaleService(APIClient):
         """
         # 设置请求头
         headers = {'Content-Type': 'application/json'}
-        headers.update(self.auth_service.get_auth_headers())
+        headers.update(self.auth_service.get_auth_headers(user))
         
         # 构造提交数据
         submit_data = {
-            'createBy': self.task_service.create_by,           # 任务创建者
+            'createBy': user.create_by,                        # 任务创建者
             'emotionalVos': [],                                # 情感数据（空）
             'eyeMoveData': '',                                 # 眼动数据（空）
             'questionOptionScoreList': answers,               # 问卷答案
             'resourceUrls': '',                                # 资源URL（空）
             'scaleId': scale_id,                              # 问卷ID
-            'taskId': self.task_service.task_id,              # 任务ID
+            'taskId': user.task_id,                           # 任务ID
             'useTime': '00:07:033',                           # 用时（固定值）
-            'userId': self.auth_service.user_id               # 用户ID
+            'userId': user.user_id                            # 用户ID
         }
         
         # 发送提交请求
@@ -92,30 +103,39 @@ class ScaleService(APIClient):
         self.logger.error(f"提交答案失败: {data}")
         return False
     
-    async def get_report(self, session: aiohttp.ClientSession, scale_id: str) -> bool:
+    async def get_report(self, session: aiohttp.ClientSession, user: VirtualUser, scale_id: str,
+                         repeat: bool = False) -> bool:
         """
         获取测评报告
         
         Args:
             session: aiohttp会话对象
+            user: 已获取任务的虚拟用户
             scale_id: 问卷ID
+            repeat: 是否为重复查看，重复查看的延迟记为 REPEAT_VIEW_METRIC
             
         Returns:
             bool: 获取是否成功
         """
         # 获取认证头
-        headers = self.auth_service.get_auth_headers()
+        headers = self.auth_service.get_auth_headers(user)
         
         # 构造报告请求数据
         report_data = {
-            "taskId": str(self.task_service.task_id),    # 任务ID
-            "stuId": str(self.auth_service.user_id),     # 学生ID
+            "taskId": str(user.task_id),                 # 任务ID
+            "stuId": str(user.user_id),                  # 学生ID
             "scaleId": str(scale_id)                     # 问卷ID
         }
         
         # 发送获取报告请求
         status, data = await self._make_request(session, "POST", "/jeecg-boot/api/getReportUserInfo", 
-                                              headers=headers, data=report_data)
+                                              headers=headers, data=report_data,
+                                              metric_name=REPEAT_VIEW_METRIC if repeat else None)
         self.log_response("获取测评报告", f"{self.base_url}/jeecg-boot/api/getReportUserInfo", status, data)
         
-        return status == 200
\ No newline at end of file
+        # 与其他接口一致，同时检查业务结果
+        if status == 200 and data.get('success') is not False:
+            return True
+        
+        self.logger.error(f"获取报告失败: {status} {data.get('message', '')}")
+        return False
\ No newline at end of file
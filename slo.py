@@ -0,0 +1,304 @@
+import re
+import time
+import asyncio
+import logging
+import operator
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Callable, Tuple, Iterable
+
+from metrics import MetricsRecorder, EndpointStats, LatencyHistogram
+
+# SLO 语法: <指标>[:<端点>] <比较符> <阈值>[单位]
+# 例如 "p99:getResult<800"、"error_rate<0.5%"、"throughput:clientLogin>=200"、"success_rate>=99%"
+_SLO_PATTERN = re.compile(
+    r'^\s*(?P<metric>p\d+(?:\.\d+)?|mean|max|error_rate|throughput|success_rate)'
+    r'(?::(?P<endpoint>[\w.\-#]+))?'
+    r'\s*(?P<op><=|>=|<|>)\s*'
+    r'(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>%|ms|s|/s)?\s*$'
+)
+
+_OPERATORS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+# 指标类别及各类别允许的单位，延迟类（分位数、mean、max）不在表中
+_METRIC_KINDS = {'error_rate': 'rate', 'success_rate': 'rate', 'throughput': 'throughput'}
+_UNITS = {'latency': ('ms', 's'), 'rate': ('%',), 'throughput': ('/s',)}
+
+
+class SLO:
+    """
+    单条服务等级目标
+
+    延迟类指标单位为毫秒，error_rate 为比例（可写成百分数），throughput 为请求/秒；
+    不指定端点时对所有端点合并统计。success_rate 为用户级指标（完成全部流程的用户比例），
+    不能指定端点，只在运行结束后判定
+    """
+
+    def __init__(self, text: str):
+        """
+        解析SLO表达式
+
+        Args:
+            text: SLO表达式，例如 "p99:getResult<800"
+
+        Raises:
+            ValueError: 表达式格式不正确、分位数超出范围、单位与指标不符或比例阈值大于1
+        """
+        match = _SLO_PATTERN.match(text)
+        if not match:
+            raise ValueError(f"无法解析SLO表达式: {text!r}")
+        self.text = text.strip()
+        self.metric = match.group('metric')
+        self.endpoint: Optional[str] = match.group('endpoint')
+        self.op = match.group('op')
+        self.threshold = float(match.group('value'))
+        if self.metric.startswith('p') and not 0 < float(self.metric[1:]) <= 100:
+            raise ValueError(f"分位数必须在 0~100 之间: {text!r}")
+        unit = match.group('unit')
+        if unit and unit not in _UNITS[_METRIC_KINDS.get(self.metric, 'latency')]:
+            raise ValueError(f"单位 {unit} 不适用于指标 {self.metric}: {text!r}")
+        if unit == '%':
+            self.threshold /= 100.0
+        elif unit == 's':
+            self.threshold *= 1000.0
+        if _METRIC_KINDS.get(self.metric) == 'rate' and self.threshold > 1:
+            raise ValueError(f"{self.metric} 是比例，阈值不能大于1（百分数请加 %）: {text!r}")
+        if self.metric == 'success_rate' and self.endpoint:
+            raise ValueError(f"success_rate 是用户级指标，不能指定端点: {text!r}")
+
+    @property
+    def upper_bound(self) -> bool:
+        """是否为上限约束（值越小越好）"""
+        return self.op in ('<', '<=')
+
+    def check(self, value: float) -> bool:
+        """
+        判断指标值是否满足目标
+
+        Args:
+            value: 指标值
+
+        Returns:
+            bool: 是否满足
+        """
+        return _OPERATORS[self.op](value, self.threshold)
+
+    def measure(self, endpoints: Dict[str, EndpointStats]) -> Tuple[float, int]:
+        """
+        从端点统计中计算指标值
+
+        Args:
+            endpoints: 端点名 -> 统计
+
+        Returns:
+            Tuple[float, int]: (指标值, 样本数)
+        """
+        stats = merge_stats(endpoints, self.endpoint)
+        if self.metric == 'error_rate':
+            value = stats.errors / stats.count if stats.count else 0.0
+        elif self.metric == 'throughput':
+            value = stats.throughput
+        elif self.metric == 'mean':
+            value = stats.histogram.mean
+        elif self.metric == 'max':
+            value = stats.histogram.max
+        else:
+            value = stats.histogram.percentile(float(self.metric[1:]))
+        return value, stats.count
+
+    def __repr__(self) -> str:
+        return f"SLO({self.text!r})"
+
+
+def merge_stats(endpoints: Dict[str, EndpointStats], endpoint: Optional[str] = None) -> EndpointStats:
+    """
+    合并端点统计
+
+    Args:
+        endpoints: 端点名 -> 统计
+        endpoint: 只取该端点，None表示合并全部端点
+
+    Returns:
+        EndpointStats: 合并后的统计
+    """
+    if endpoint is not None:
+        return endpoints.get(endpoint) or EndpointStats()
+    merged = EndpointStats()
+    for stats in endpoints.values():
+        if not stats.count:
+            continue
+        merged.histogram.merge(stats.histogram)
+        merged.first_t = stats.first_t if not merged.count else min(merged.first_t, stats.first_t)
+        merged.last_t = max(merged.last_t, stats.last_t)
+        merged.count += stats.count
+        merged.errors += stats.errors
+    return merged
+
+
+@dataclass
+class SLOResult:
+    """单条SLO的检查结果"""
+    slo: SLO
+    value: float
+    samples: int
+    passed: bool
+    note: Optional[str] = None   # 无法判定的原因（没有样本、端点不存在），此时判定为未通过
+
+    def describe(self) -> str:
+        """生成可读的结果描述"""
+        if self.note:
+            return f"✗ {self.slo.text}: {self.note}"
+        if self.slo.metric in ('error_rate', 'success_rate'):
+            value = f"{self.value * 100:.3f}%"
+        elif self.slo.metric == 'throughput':
+            value = f"{self.value:.1f}/s"
+        else:
+            value = f"{self.value:.1f}ms"
+        mark = "✓" if self.passed else "✗"
+        return f"{mark} {self.slo.text}: 实测 {value}（样本 {self.samples}）"
+
+
+class SLOMonitor:
+    """
+    SLO实时监控
+
+    运行期间定期按最近一个检查周期内的请求检查上限类SLO（延迟、错误率），
+    明显违反（超出阈值 abort_factor 倍）并连续 abort_checks 次时触发提前终止；
+    运行结束后按全部请求做最终判定，吞吐类SLO只在最终判定时检查
+    """
+
+    def __init__(self, recorder: MetricsRecorder, slos: List[SLO], interval: float = 5.0,
+                 min_samples: int = 100, abort: bool = False, abort_factor: float = 2.0,
+                 abort_checks: int = 3, on_abort: Optional[Callable[[], None]] = None):
+        """
+        初始化监控器
+
+        Args:
+            recorder: 指标记录器
+            slos: 要检查的SLO列表
+            interval: 检查周期（秒）
+            min_samples: 周期内样本数少于该值时不做判断
+            abort: 是否允许提前终止
+            abort_factor: 明显违反的倍数
+            abort_checks: 连续违反多少个周期后终止
+            on_abort: 触发终止时调用的回调
+        """
+        self.recorder = recorder
+        self.slos = slos
+        self.interval = interval
+        self.min_samples = min_samples
+        self.abort = abort
+        self.abort_factor = abort_factor
+        self.abort_checks = abort_checks
+        self.on_abort = on_abort
+        self.abort_reason: Optional[str] = None
+        self._breaches: Dict[str, int] = {}
+        self._snapshot: Dict[str, Tuple[LatencyHistogram, int, int]] = {}
+        self._snapshot_time = time.time()
+        self._task: Optional[asyncio.Task] = None
+        self.logger = logging.getLogger('SLOMonitor')
+
+    def _window_stats(self) -> Dict[str, EndpointStats]:
+        """计算上次检查以来新增请求的端点统计，并更新快照"""
+        now = time.time()
+        window = {}
+        for name, stats in self.recorder.endpoints.items():
+            previous = self._snapshot.get(name)
+            delta = EndpointStats()
+            if previous is None:
+                delta.histogram = stats.histogram.copy()
+                delta.count, delta.errors = stats.count, stats.errors
+            else:
+                hist, count, errors = previous
+                delta.histogram = stats.histogram.delta(hist)
+                delta.count, delta.errors = stats.count - count, stats.errors - errors
+            delta.first_t, delta.last_t = self._snapshot_time, now
+            window[name] = delta
+            self._snapshot[name] = (stats.histogram.copy(), stats.count, stats.errors)
+        self._snapshot_time = now
+        return window
+
+    def check_window(self) -> None:
+        """检查最近一个周期，必要时触发提前终止"""
+        window = self._window_stats()
+        for slo in self.slos:
+            if not slo.upper_bound or slo.metric in ('throughput', 'success_rate'):
+                continue
+            value, samples = slo.measure(window)
+            if samples < self.min_samples:
+                continue
+            if not slo.check(value):
+                self.logger.warning(f"SLO违反: {slo.text}，最近{self.interval:g}秒实测 {value:.4g}")
+            if value > slo.threshold * self.abort_factor:
+                self._breaches[slo.text] = self._breaches.get(slo.text, 0) + 1
+            else:
+                self._breaches[slo.text] = 0
+
+            if self.abort and self._breaches[slo.text] >= self.abort_checks and not self.abort_reason:
+                self.abort_reason = (f"{slo.text} 连续 {self.abort_checks} 个周期超出阈值"
+                                     f" {self.abort_factor:g} 倍（实测 {value:.4g}）")
+                self.logger.error(f"提前终止测试: {self.abort_reason}")
+                if self.on_abort:
+                    self.on_abort()
+
+    async def _run(self) -> None:
+        """后台定期检查"""
+        while True:
+            await asyncio.sleep(self.interval)
+            self.check_window()
+
+    def start(self) -> None:
+        """启动后台检查任务"""
+        if self.slos and self._task is None:
+            self._snapshot_time = time.time()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台检查任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def evaluate(self, users: Optional[Tuple[int, int]] = None,
+                 skip_endpoints: Iterable[str] = ()) -> List[SLOResult]:
+        """
+        按全部请求做最终判定
+
+        没有样本的SLO（端点名写错、端点未被请求）判定为未通过，不会因为没有数据而空过
+
+        Args:
+            users: (成功用户数, 总用户数)，用于判定 success_rate
+            skip_endpoints: 本次运行有意没有请求的端点（如全部复用登录缓存时的登录接口），
+                            针对这些端点的SLO不参与判定
+
+        Returns:
+            List[SLOResult]: 每条SLO的结果
+        """
+        endpoints = self.recorder.endpoints
+        recorded = [name for name, stats in endpoints.items() if stats.count]
+        results = []
+        for slo in self.slos:
+            if slo.metric == 'success_rate':
+                succeeded, total = users or (0, 0)
+                if not total:
+                    results.append(SLOResult(slo, 0.0, 0, False, "没有用户结果，无法判定"))
+                    continue
+                value = succeeded / total
+                results.append(SLOResult(slo, value, total, slo.check(value)))
+                continue
+            if slo.endpoint in skip_endpoints:
+                continue
+            if slo.endpoint and slo.endpoint not in recorded:
+                results.append(SLOResult(slo, 0.0, 0, False,
+                                         f"端点 {slo.endpoint} 没有记录到请求"
+                                         f"（已记录: {', '.join(recorded) or '无'}）"))
+                continue
+            value, samples = slo.measure(endpoints)
+            if not samples:
+                results.append(SLOResult(slo, value, 0, False, "没有样本，无法判定"))
+                continue
+            results.append(SLOResult(slo, value, samples, slo.check(value)))
+        return results
@@ -0,0 +1,103 @@
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List, Tuple
+
+# 压测进程启动路径上各模块的导入耗时预算（毫秒，含Python标准库）
+IMPORT_BUDGET_MS: Dict[str, float] = {
+    'test': 150.0,
+    'concurrent_test_manager': 150.0,
+}
+
+# 启动路径上不应出现的模块：只在创建会话、开启剖析或分析结果时才需要
+FORBIDDEN_ON_STARTUP = ('aiohttp', 'httpx', 'numpy', 'yappi', 'cProfile', 'pstats', 'Tools')
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+
+def measure_import(module: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    在新进程中导入模块并统计耗时
+
+    Args:
+        module: 模块名
+
+    Returns:
+        tuple: (累计导入耗时毫秒, [(模块名, 自身耗时毫秒), ...] 按自身耗时降序)
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr[-2000:]}")
+    total = 0.0
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, name = int(match[1]), int(match[2]), match[4]
+        modules.append((name, self_us / 1000))
+        if name == module:
+            total = cumulative_us / 1000
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return total, modules
+
+
+def measure_spawn(module: str, workers: int) -> float:
+    """
+    同时启动多个进程并导入模块，测量全部完成所需时间
+
+    Args:
+        module: 压测进程的入口模块
+        workers: 进程数
+
+    Returns:
+        float: 墙钟耗时（毫秒）
+    """
+    start = time.perf_counter()
+    processes = [subprocess.Popen([sys.executable, '-c', f'import {module}'])
+                 for _ in range(workers)]
+    for process in processes:
+        process.wait()
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> int:
+    """命令行入口：检查启动路径的导入耗时是否在预算内，并测量批量启动压测进程的耗时"""
+    parser = argparse.ArgumentParser(description="压测进程启动耗时检查")
+    parser.add_argument('--runs', type=int, default=5, help="每个模块测量次数，取中位数")
+    parser.add_argument('--workers', type=int, default=32, help="批量启动的压测进程数，0表示不测")
+    parser.add_argument('--top', type=int, default=5, help="列出自身耗时最高的模块数")
+    args = parser.parse_args()
+
+    passed = True
+    for module, budget in IMPORT_BUDGET_MS.items():
+        samples = []
+        modules: List[Tuple[str, float]] = []
+        for _ in range(max(1, args.runs)):
+            total, modules = measure_import(module)
+            samples.append(total)
+        elapsed = statistics.median(samples)
+        verdict = '通过' if elapsed <= budget else '超出预算'
+        passed &= elapsed <= budget
+        print(f"[{module}] 导入耗时中位数 {elapsed:.1f}ms（预算 {budget:g}ms）: {verdict}")
+        print("  自身耗时最高: " + "，".join(f"{name} {ms:.1f}ms" for name, ms in modules[:args.top]))
+
+        loaded = {name for name, _ in modules}
+        forbidden = [name for name in FORBIDDEN_ON_STARTUP if name in loaded]
+        if forbidden:
+            passed = False
+            print(f"  启动路径上导入了不应加载的模块: {', '.join(forbidden)}")
+
+    if args.workers:
+        elapsed = measure_spawn('test', args.workers)
+        print(f"同时启动 {args.workers} 个压测进程并完成导入: {elapsed:.0f}ms")
+
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
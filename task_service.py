@@ -1,15 +1,20 @@
-import aiohttp
-from typing import List, Dict, Any, Optional
+from __future__ import annotations
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 from api_client import APIClient
+from virtual_user import VirtualUser
+if TYPE_CHECKING:
+    import aiohttp
 
 class TaskService(APIClient):
     """
     任务服务类
     
-    负责获取和管理学生的测评任务，包括任务列表和问卷信息
+    负责获取和管理学生的测评任务，包括任务列表和问卷信息。
+    服务本身不保存用户状态，任务信息写入传入的虚拟用户，同一实例可被所有用户共享
     """
     
-    def __init__(self, base_url: str, auth_service, debug: bool = False):
+    def __init__(self, base_url: str, auth_service, debug: bool = False, recorder=None,
+                 validator=None):
         """
         初始化任务服务
         
@@ -17,30 +22,33 @@ class TaskService(APIClient):
             base_url: API服务器基础URL
             auth_service: 认证服务实例，用于获取认证信息
             debug: 是否开启调试模式
+            recorder: 可选的指标记录器
+            validator: 可选的响应校验器
         """
-        super().__init__(base_url, debug)
+        super().__init__(base_url, debug, recorder, validator)
         self.auth_service = auth_service
-        self.task_id: Optional[str] = None              # 当前任务ID
-        self.create_by: Optional[str] = None            # 任务创建者ID
-        self.scale_list: List[Dict[str, Any]] = []      # 问卷列表
+        # 任务ID -> 首个用户的问卷列表，列表相同的用户引用同一份问卷数据
+        self._scale_lists: Dict[str, List[Dict[str, Any]]] = {}
     
-    async def get_student_tasks(self, session: aiohttp.ClientSession) -> bool:
+    async def get_student_tasks(self, session: aiohttp.ClientSession, user: VirtualUser) -> bool:
         """
         获取学生任务列表
         
         Args:
             session: aiohttp会话对象
+            user: 已登录的虚拟用户，成功后写入任务信息
             
         Returns:
             bool: 是否成功获取任务
         """
         # 获取认证头信息
-        headers = self.auth_service.get_auth_headers()
+        headers = self.auth_service.get_auth_headers(user)
         # 构造请求端点，包含用户ID
-        endpoint = f"/jeecg-boot/api/isUserHasTask/{self.auth_service.user_id}"
+        endpoint = f"/jeecg-boot/api/isUserHasTask/{user.user_id}"
         
-        # 发送获取任务请求
-        status, data = await self._make_request(session, "GET", endpoint, headers=headers)
+        # 发送获取任务请求，路径中的用户ID不一定是数字，显式指定端点名称避免每个用户各算一个端点
+        status, data = await self._make_request(session, "GET", endpoint, headers=headers,
+                                                metric_name='isUserHasTask')
         self.log_response("获取任务列表", f"{self.base_url}{endpoint}", status, data)
         
         # 检查HTTP状态码
@@ -53,13 +61,17 @@ class TaskService(APIClient):
             if len(data['result']) > 0:
                 # 获取第一个任务的信息
                 task_info = data['result'][0]
-                self.task_id = task_info['evaluation']['id']
-                self.create_by = task_info['evaluation']['createBy']
-                self.scale_list = task_info['scaleList']
+                user.task_id = task_info['evaluation']['id']
+                user.create_by = task_info['evaluation']['createBy']
+                # 与同一任务已缓存的问卷列表相同时复用缓存，本次解析出的副本随响应一起释放；
+                # 服务端按学生返回不同列表（如去掉已完成的问卷）时使用该学生自己的列表
+                scale_list = task_info['scaleList']
+                cached = self._scale_lists.setdefault(user.task_id, scale_list)
+                user.scale_list = cached if cached == scale_list else scale_list
                 
                 # 记录任务信息
                 self.logger.info(f"获取到任务: {task_info['evaluation']['taskName']}")
-                self.logger.info(f"创建者: {self.create_by}, 包含 {len(self.scale_list)} 个问卷")
+                self.logger.info(f"创建者: {user.create_by}, 包含 {len(user.scale_list)} 个问卷")
                 return True
             else:
                 self.logger.warning("任务列表为空")
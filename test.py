@@ -1,8 +1,11 @@
+import os
+import sys
+import argparse
 import asyncio
+from typing import List, Dict
 from config import TestConfig, ConcurrentTestConfig, AdminConfig
-from test_runner import TestRunner
-from concurrent_test_manager import ConcurrentTestManager
-from full_test_manager import FullTestManager
+# 运行器和各管理器依赖aiohttp及全部服务，在实际使用的函数内导入，
+# 解析参数和启动压测进程时不加载（见 startup.py 的导入耗时预算）
 
 async def run_single_test():
     """
@@ -18,6 +21,8 @@ async def run_single_test():
         debug=True                                         # 开启调试模式，显示详细日志
     )
     
+    from test_runner import TestRunner
+    
     # 创建并运行测试
     runner = TestRunner(config)
     success = await runner.run_test()
@@ -28,14 +33,67 @@ async def run_single_test():
     else:
         print("测试失败")
 
-async def run_concurrent_test():
+def parse_network_profiles(items: List[str]) -> Dict[str, float]:
+    """
+    解析 --network 参数
+    
+    Args:
+        items: 形如 "4g:0.6"、"school-lab"、"rtt=300,down=64:0.1" 的列表，冒号后为权重（默认1）
+        
+    Returns:
+        Dict[str, float]: 网络条件 -> 权重
+    """
+    profiles = {}
+    for item in items:
+        name, _, weight = item.rpartition(':') if ':' in item else (item, '', '')
+        profiles[name] = float(weight) if weight else 1.0
+    return profiles
+
+def build_concurrent_config(args: argparse.Namespace) -> ConcurrentTestConfig:
+    """
+    根据命令行参数创建并发测试配置
+    
+    Args:
+        args: 命令行参数
+        
+    Returns:
+        ConcurrentTestConfig: 并发测试配置
+    """
+    return ConcurrentTestConfig(
+        user_count=1000,  # 1000个并发用户（最高优先级）
+        checkpoint_path=args.checkpoint,
+        resume=args.resume,
+        slos=args.slo,
+        slo_abort=args.slo_abort,
+        min_success_rate=args.min_success_rate,
+        credential_file=args.credentials,
+        credential_strategy=args.credential_strategy,
+        worker_id=args.worker_id,
+        worker_count=args.worker_count,
+        profile=args.profile or args.profile_stacks,
+        profile_stacks=args.profile_stacks,
+        transport=args.transport,
+        network_profiles=parse_network_profiles(args.network),
+        validate_every=args.validate_every,
+        validate_in_thread=args.validate_in_thread,
+        trace_path=args.trace,
+        repeat_view_rate=args.repeat_view_rate,
+        repeat_view_tail=args.repeat_view_tail
+    )
+
+async def run_concurrent_test(concurrent_config: ConcurrentTestConfig) -> bool:
     """
     运行并发测试的示例函数
     
     用于执行大规模并发测试，模拟多用户同时访问系统
+    
+    Args:
+        concurrent_config: 并发测试配置
+        
+    Returns:
+        bool: 是否通过SLO判定
     """
-    # 创建并发测试配置
-    concurrent_config = ConcurrentTestConfig(user_count=1000)  # 1000个并发用户（最高优先级）
+    from concurrent_test_manager import ConcurrentTestManager
     
     # 创建并发测试管理器
     manager = ConcurrentTestManager(
@@ -44,10 +102,12 @@ async def run_concurrent_test():
     )
     
     # 执行并发测试（关闭调试模式以提高性能）
-    await manager.run_concurrent_tests(debug=False)
+    return await manager.run_concurrent_tests(debug=False)
 
-async def run_full_flow_test():
+async def run_full_flow_test(concurrent_config: ConcurrentTestConfig) -> bool:
     """运行完整流程测试：管理员发布 + 学生并发测试"""
+    from full_test_manager import FullTestManager
+    
     admin_config = AdminConfig(
         base_url="http://localhost:8999/",
         admin_username="testAdmin",
@@ -57,9 +117,6 @@ async def run_full_flow_test():
         debug=False
     )
     
-    # 并发测试配置
-    concurrent_config = ConcurrentTestConfig(user_count=1000)
-    
     # 创建完整流程管理器
     full_manager = FullTestManager(admin_config, concurrent_config)
     
@@ -70,21 +127,107 @@ async def run_full_flow_test():
         print("完整流程测试成功")
     else:
         print("完整流程测试失败")
+    return success
 
-async def main():
+async def run_capacity_search(concurrent_config: ConcurrentTestConfig,
+                              start_users: int, max_users: int) -> bool:
+    """
+    运行容量搜索，自动寻找满足SLO的最大并发用户数
+    
+    Args:
+        concurrent_config: 并发测试配置模板
+        start_users: 起始并发用户数
+        max_users: 搜索上限
+        
+    Returns:
+        bool: 起始规模是否通过（即是否找到了可承受的规模）
+    """
+    from capacity_search import CapacitySearch
+    
+    search = CapacitySearch(
+        base_url="http://localhost:8999/",
+        concurrent_config=concurrent_config,
+        start_users=start_users,
+        max_users=max_users
+    )
+    result = await search.run()
+    return result.max_users > 0
+
+def parse_args() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="心理测评平台自动化测试")
+    parser.add_argument('--checkpoint', default=None,
+                        help="进度检查点文件路径（默认 progress.ckpt，多进程时为 progress.<worker-id>.ckpt），"
+                             "进程中断后可用 --resume 续跑")
+    parser.add_argument('--resume', action='store_true',
+                        help="从检查点续跑，跳过已完成的用户和已提交的问卷")
+    parser.add_argument('--slo', action='append', default=[],
+                        help="SLO表达式，可重复指定，如 --slo 'p99:getResult<800' --slo 'error_rate<0.5%%'")
+    parser.add_argument('--slo-abort', action='store_true',
+                        help="SLO明显违反时提前终止测试")
+    parser.add_argument('--min-success-rate', type=float, default=0.99,
+                        help="用户成功率下限，未指定 success_rate SLO 时作为默认判定（0表示不检查）")
+    parser.add_argument('--credentials', default=None,
+                        help="账号池文件（feeder.py 生成的二进制池或CSV），默认使用 test0001 规则生成账号")
+    parser.add_argument('--credential-strategy', default='sequential',
+                        choices=['sequential', 'random', 'unique', 'shard'], help="取号策略")
+    parser.add_argument('--worker-id', type=int, default=0, help="当前压测进程编号（多进程时划分账号）")
+    parser.add_argument('--worker-count', type=int, default=1, help="压测进程总数")
+    parser.add_argument('--profile', action='store_true',
+                        help="剖析压测机自身（事件循环延迟、CPU占用），并给出压测机是否饱和的结论")
+    parser.add_argument('--profile-stacks', action='store_true', help="剖析时开启栈采样")
+    parser.add_argument('--transport', default='aiohttp', choices=['aiohttp', 'httpx-h2', 'http1-pipeline'],
+                        help="传输层：aiohttp（默认）、httpx-h2（HTTP/2多路复用）、http1-pipeline（HTTP/1.1流水线）")
+    parser.add_argument('--network', action='append', default=[],
+                        help="按比例为用户模拟网络条件，可重复指定，如 --network 4g:0.6 --network school-lab:0.3 "
+                             "--network 'rtt=300,down=64,drop=0.02:0.1'")
+    parser.add_argument('--validate-every', type=int, default=0,
+                        help="校验响应结构，每N个响应抽样校验1个（1为全部校验，默认不校验）")
+    parser.add_argument('--validate-in-thread', action='store_true', help="在后台线程中校验响应")
+    parser.add_argument('--trace', default=None,
+                        help="录制请求轨迹（如 run.trace.gz），之后可用 replay.py 按原始节奏回放")
+    parser.add_argument('--repeat-view-rate', type=float, default=0.0,
+                        help="报告重复查看负载：每秒随机重新请求多少份已生成的报告（默认不开启）")
+    parser.add_argument('--repeat-view-tail', type=float, default=0.0,
+                        help="答题流程结束后继续重复查看报告的时间（秒）")
+    parser.add_argument('--capacity-search', action='store_true',
+                        help="容量搜索模式：逐级加压并二分，找出满足SLO的最大并发用户数")
+    parser.add_argument('--start-users', type=int, default=100, help="容量搜索的起始并发用户数")
+    parser.add_argument('--max-users', type=int, default=9999, help="容量搜索的并发用户数上限")
+    args = parser.parse_args()
+    if not args.checkpoint:
+        args.checkpoint = 'progress.ckpt' if args.worker_count == 1 else f'progress.{args.worker_id}.ckpt'
+    # 没有检查点时续跑会让所有学生在已发布的任务上重复提交，直接报错退出
+    if args.resume and not os.path.exists(args.checkpoint):
+        parser.error(f"检查点文件不存在，无法续跑: {args.checkpoint}")
+    return args
+
+async def main() -> int:
     """
     主函数，程序入口点
     
     可以选择运行不同类型的测试
+    
+    Returns:
+        int: 进程退出码，测试失败或未通过SLO时为1
     """
+    args = parse_args()
+    concurrent_config = build_concurrent_config(args)
+    
+    if args.capacity_search:
+        success = await run_capacity_search(concurrent_config, args.start_users, args.max_users)
+        return 0 if success else 1
+    
     # 运行完整流程测试（管理员发布 + 学生并发测试）
-    await run_full_flow_test()
+    success = await run_full_flow_test(concurrent_config)
     
     # 或者运行并发测试
-    #await run_concurrent_test()
+    #success = await run_concurrent_test(concurrent_config)
     
     # 或者运行单个测试（用于调试）
     # await run_single_test()
+    
+    return 0 if success else 1
 
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    sys.exit(asyncio.run(main()))
\ No newline at end of file
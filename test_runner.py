@@ -1,33 +1,56 @@
-import aiohttp
+from __future__ import annotations
 import asyncio
 import time
 import logging
-from typing import Optional
+from typing import Optional, Dict, Tuple, TYPE_CHECKING
 from config import TestConfig
 from auth_service import AuthService
 from task_service import TaskService
 from scale_service import ScaleService
+from checkpoint import UserProgress
+from metrics import MetricsRecorder
+from validation import ResponseValidator
+from repeat_view import ReportIndex
+from virtual_user import VirtualUser
+if TYPE_CHECKING:
+    import aiohttp
 
 class TestRunner:
     """
     测试运行器
     
-    协调各个服务组件，执行完整的测试流程：登录 -> 获取任务 -> 填写问卷 -> 获取报告
+    协调各个服务组件，执行完整的测试流程：登录 -> 获取任务 -> 填写问卷 -> 获取报告。
+    服务组件不保存用户状态，同一个运行器可以通过 run_user 驱动任意多个虚拟用户；
+    run_test 保留单用户用法，驱动由配置中的账号创建的虚拟用户
     """
     
-    def __init__(self, config: TestConfig):
+    def __init__(self, config: TestConfig, progress: Optional[UserProgress] = None,
+                 recorder: Optional[MetricsRecorder] = None,
+                 token_pool: Optional[Dict[str, Tuple[str, str]]] = None,
+                 validator: Optional[ResponseValidator] = None,
+                 report_index: Optional[ReportIndex] = None):
         """
         初始化测试运行器
         
         Args:
             config: 测试配置对象
+            progress: 可选的用户进度对象，提供时会记录进度并跳过已完成的步骤
+            recorder: 可选的指标记录器，由各服务共享
+            token_pool: 可选的登录缓存，用户名 -> (用户ID, token)，命中时跳过登录
+            validator: 可选的响应校验器，由各服务共享
+            report_index: 可选的报告索引，首次查看成功的报告登记到索引中供重复查看
         """
         self.config = config
+        self.report_index = report_index
+        self.progress = progress
+        self.token_pool = token_pool
+        self.reused_logins = 0  # 复用已有token、跳过登录请求的用户数
+        self.user = VirtualUser(config.username, config.password)
         # 初始化各个服务组件
-        self.auth_service = AuthService(config.base_url, config.debug)
-        self.task_service = TaskService(config.base_url, self.auth_service, config.debug)
+        self.auth_service = AuthService(config.base_url, config.debug, recorder, validator)
+        self.task_service = TaskService(config.base_url, self.auth_service, config.debug, recorder, validator)
         self.scale_service = ScaleService(config.base_url, self.auth_service, 
-                                        self.task_service, config.debug)
+                                        self.task_service, config.debug, recorder, validator)
         # 设置日志器
         self.logger = logging.getLogger('TestRunner')
         self.logger.setLevel(logging.DEBUG if config.debug else logging.INFO)
@@ -45,71 +68,119 @@ class TestRunner:
         # 判断是否需要创建和关闭会话
         should_close_session = session is None
         if session is None:
+            import aiohttp
             session = aiohttp.ClientSession()
         
         try:
-            return await self._execute_test(session)
+            return await self.run_user(session, self.user, self.progress)
         finally:
             # 只有自己创建的会话才需要关闭
             if should_close_session:
                 await session.close()
     
-    async def _execute_test(self, session: aiohttp.ClientSession) -> bool:
+    async def run_user(self, session: aiohttp.ClientSession, user: VirtualUser,
+                       progress: Optional[UserProgress] = None) -> bool:
         """
-        执行测试逻辑的核心方法
+        执行单个虚拟用户的测试流程
         
         Args:
             session: aiohttp会话对象
+            user: 虚拟用户
+            progress: 可选的用户进度对象
             
         Returns:
             bool: 测试是否成功
         """
         self.logger.info("=== 开始学生端自动化测试 ===")
         
-        # 步骤1: 用户登录
-        if not await self.auth_service.login(session, self.config.username, self.config.password):
+        # 步骤1: 用户登录（已有token或登录缓存命中时直接复用）
+        cached = self.token_pool.get(user.username) if self.token_pool is not None else None
+        if cached:
+            user.user_id, user.token = cached
+            self.reused_logins += 1
+        elif user.token and user.user_id:
+            self.reused_logins += 1
+        elif not await self.auth_service.login(session, user):
             self.logger.error("测试失败：登录失败")
             return False
+        elif self.token_pool is not None:
+            self.token_pool[user.username] = (user.user_id, user.token)
+        if progress:
+            progress.mark_login()
         
         # 步骤2: 获取任务列表
-        if not await self.task_service.get_student_tasks(session):
+        if not await self.task_service.get_student_tasks(session, user):
             self.logger.error("测试失败：无法获取任务")
             return False
+        if progress:
+            progress.mark_task(user.task_id)
         
         # 步骤3: 处理所有问卷
-        return await self._process_scales(session)
+        if not await self._process_scales(session, user, progress):
+            return False
+        if progress:
+            progress.mark_done()
+        return True
     
-    async def _process_scales(self, session: aiohttp.ClientSession) -> bool:
+    async def _process_scales(self, session: aiohttp.ClientSession, user: VirtualUser,
+                              progress: Optional[UserProgress] = None) -> bool:
         """
         处理所有问卷的方法
         
         Args:
             session: aiohttp会话对象
+            user: 已获取任务的虚拟用户
+            progress: 可选的用户进度对象
         
         Returns:
             bool: 所有问卷处理是否成功
         """
         # 遍历任务中的所有问卷
-        for i, scale in enumerate(self.task_service.scale_list, 1):
-            scale_id = scale['id']
-            scale_name = scale['scaleName']
-            option_vo_list = scale['optionVo']
-            
-            self.logger.info(f"[{i}/{len(self.task_service.scale_list)}] 开始填写问卷: {scale_name}")
+        for i, scale in enumerate(user.scale_list, 1):
+            # 问卷数据不完整时按失败处理，不让KeyError中断整个用户任务
+            scale_id = scale.get('id')
+            scale_name = scale.get('scaleName', scale_id)
+            option_vo_list = scale.get('optionVo')
+            if scale_id is None or not isinstance(option_vo_list, list):
+                self.logger.error(f"[{i}/{len(user.scale_list)}] 问卷数据格式错误（缺少id或optionVo）: {scale_name}")
+                return False
             
-            # 为当前问卷生成随机答案
-            answers = self.scale_service.generate_random_answers(option_vo_list)
+            self.logger.info(f"[{i}/{len(user.scale_list)}] 开始填写问卷: {scale_name}")
             
-            # 提交问卷答案
-            if await self.scale_service.submit_scale_answers(session, scale_id, answers):
-                self.logger.info("✓ 答案提交成功")
+            # 续跑时跳过已提交的问卷，避免重复提交
+            if progress and progress.is_submitted(scale_id):
+                self.logger.info("✓ 答案已提交过，跳过")
             else:
-                self.logger.error("✗ 答案提交失败")
-                return False  # 立即返回失败
+                # 为当前问卷生成随机答案
+                try:
+                    answers = self.scale_service.generate_random_answers(option_vo_list)
+                except (KeyError, IndexError, TypeError) as e:
+                    self.logger.error(f"✗ 问卷题目格式错误: {type(e).__name__} {e}")
+                    return False
+                
+                # 提交问卷答案
+                if await self.scale_service.submit_scale_answers(session, user, scale_id, answers):
+                    self.logger.info("✓ 答案提交成功")
+                    if progress:
+                        progress.mark_submitted(scale_id)
+                else:
+                    self.logger.error("✗ 答案提交失败")
+                    return False  # 立即返回失败
+            
+            # 续跑时跳过已获取的报告
+            if progress and progress.is_reported(scale_id):
+                self.logger.info("✓ 报告已获取过，跳过")
+                if self.report_index is not None:
+                    self.report_index.add(user, scale_id, session)
+                continue
             
             # 获取测评报告
-            if await self.scale_service.get_report(session, scale_id):
+            if await self.scale_service.get_report(session, user, scale_id):
                 self.logger.info("✓ 报告获取成功")
+                if progress:
+                    progress.mark_reported(scale_id)
+                if self.report_index is not None:
+                    self.report_index.add(user, scale_id, session)
             else:
                 self.logger.error("✗ 报告获取失败")
                 return False  # 立即返回失败
@@ -0,0 +1,271 @@
+from __future__ import annotations
+import ssl
+import json
+import asyncio
+from collections import deque
+from urllib.parse import urlsplit
+from typing import Dict, Any, Optional, Tuple, List, Callable, TYPE_CHECKING
+if TYPE_CHECKING:
+    import aiohttp
+
+
+TRANSPORTS = ('aiohttp', 'httpx-h2', 'http1-pipeline')
+
+
+async def aiohttp_request(session: aiohttp.ClientSession, method: str, url: str,
+                          headers: Dict[str, str], data: Optional[Dict]) -> Tuple[int, Dict[str, Any]]:
+    """
+    通过aiohttp会话发送请求
+
+    Args:
+        session: aiohttp会话对象
+        method: HTTP方法
+        url: 完整URL
+        headers: 请求头
+        data: 请求体数据（以JSON发送）
+
+    Returns:
+        tuple: (状态码, 响应数据字典)
+    """
+    async with session.request(method, url, headers=headers, json=data) as response:
+        status = response.status
+        # 只有状态码为200时才解析JSON响应
+        response_data = await response.json() if status == 200 else {}
+        return status, response_data
+
+
+class Transport:
+    """
+    HTTP传输层基类
+
+    可以替代aiohttp会话传给各服务的请求方法，APIClient 在同一位置记录指标，
+    因此不同传输层的压测结果可以直接对比
+    """
+
+    async def request(self, method: str, url: str, headers: Dict[str, str],
+                      data: Optional[Dict]) -> Tuple[int, Dict[str, Any]]:
+        """
+        发送请求
+
+        Args:
+            method: HTTP方法
+            url: 完整URL
+            headers: 请求头
+            data: 请求体数据（以JSON发送）
+
+        Returns:
+            tuple: (状态码, 响应数据字典)
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """关闭传输层持有的连接"""
+
+
+class HttpxTransport(Transport):
+    """
+    基于httpx的传输层，默认启用HTTP/2多路复用
+
+    网关支持HTTP/2时，大量并发请求复用少量TCP连接；需要安装 httpx[http2]
+    """
+
+    def __init__(self, http2: bool = True, max_connections: int = 100):
+        """
+        Args:
+            http2: 是否启用HTTP/2
+            max_connections: 最大连接数
+
+        Raises:
+            ImportError: 未安装httpx（或启用HTTP/2时未安装h2）
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("httpx-h2 传输层需要安装 httpx[http2]: pip install 'httpx[http2]'")
+        self.client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            timeout=None
+        )
+
+    async def request(self, method, url, headers, data):
+        response = await self.client.request(method, url, headers=headers, json=data)
+        status = response.status_code
+        return status, response.json() if status == 200 else {}
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class _PipelinedConnection:
+    """单条HTTP/1.1长连接，请求连续写出，响应按顺序读回"""
+
+    __slots__ = ('reader', 'writer', 'pending', 'reader_task', 'closed', 'on_release')
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 on_release: Callable[[], None]):
+        self.reader = reader
+        self.writer = writer
+        self.pending: deque = deque()     # 等待响应的future，顺序与请求一致
+        self.closed = False
+        self.on_release = on_release      # 在途请求减少或连接关闭时调用
+        self.reader_task = asyncio.create_task(self._read_responses())
+
+    async def _read_body(self, headers: Dict[str, str]) -> bytes:
+        """按Content-Length或chunked编码读取响应体"""
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b';', 1)[0], 16)
+                if size == 0:
+                    # 跳过trailer直到空行
+                    while (await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    return b''.join(chunks)
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+        length = int(headers.get('content-length', 0))
+        return await self.reader.readexactly(length) if length else b''
+
+    async def _read_responses(self) -> None:
+        """后台读取响应并依次唤醒等待的请求"""
+        try:
+            while True:
+                status_line = await self.reader.readline()
+                if not status_line:
+                    raise ConnectionResetError("连接已被服务端关闭")
+                status = int(status_line.split(b' ', 2)[1])
+                headers = {}
+                while True:
+                    line = await self.reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await self._read_body(headers)
+
+                future = self.pending.popleft()
+                if not future.done():
+                    future.set_result((status, body))
+                self.on_release()
+                if headers.get('connection', '').lower() == 'close':
+                    raise ConnectionResetError("服务端要求关闭连接")
+        except asyncio.CancelledError:
+            self._fail(ConnectionResetError("连接已关闭"))
+            raise
+        except Exception as e:
+            self._fail(e)
+
+    def _fail(self, error: Exception) -> None:
+        """关闭连接，并让所有未完成的请求以异常结束"""
+        self.closed = True
+        while self.pending:
+            future = self.pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+        self.writer.close()
+        self.on_release()
+
+    def send(self, payload: bytes) -> asyncio.Future:
+        """写出一个请求并返回等待其响应的future"""
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append(future)
+        self.writer.write(payload)
+        return future
+
+    async def close(self) -> None:
+        self.reader_task.cancel()
+        try:
+            await self.reader_task
+        except asyncio.CancelledError:
+            pass
+
+
+class PipelinedHTTP1Transport(Transport):
+    """
+    低开销的HTTP/1.1流水线传输层
+
+    直接基于asyncio流实现，固定数量的长连接上连续写出请求、按顺序读取响应，
+    不做重定向、Cookie、重试等处理，用最少的套接字和CPU获得最大压测吞吐。
+    服务端或网关必须支持HTTP/1.1流水线；连接断开时该连接上未完成的请求以异常结束，不会重发
+    """
+
+    def __init__(self, base_url: str, connections: int = 64, depth: int = 16):
+        """
+        Args:
+            base_url: API服务器基础URL，所有请求必须发往同一主机
+            connections: 长连接数量
+            depth: 每条连接上同时在途的最大请求数
+        """
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.port = parts.port or (443 if self.ssl else 80)
+        self.host_header = parts.netloc.encode('latin-1')
+        self.connections = connections
+        self.depth = depth
+        self._pool: List[_PipelinedConnection] = []
+        self._slots = asyncio.Semaphore(connections * depth)
+        self._connecting = 0
+        self._released = asyncio.Event()    # 有连接空出在途名额、关闭或建立完成时置位
+
+    async def _acquire_connection(self) -> _PipelinedConnection:
+        """
+        选择在途请求最少且未达depth的连接
+
+        现有连接都在忙且连接数（含正在建立的）未达上限时新建连接；已达上限时等待
+        其他连接建立完成或空出名额，同时启动的大量请求不会各自新建连接
+        """
+        while True:
+            self._pool = [conn for conn in self._pool if not conn.closed]
+            available = [conn for conn in self._pool if len(conn.pending) < self.depth]
+            best = min(available, key=lambda conn: len(conn.pending), default=None)
+            full = len(self._pool) + self._connecting >= self.connections
+            if best is not None and (not best.pending or full):
+                return best
+            if not full:
+                break
+            self._released.clear()
+            await self._released.wait()
+
+        self._connecting += 1
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        finally:
+            self._connecting -= 1
+            self._released.set()
+        conn = _PipelinedConnection(reader, writer, self._released.set)
+        self._pool.append(conn)
+        return conn
+
+    def _encode(self, method: str, url: str, headers: Dict[str, str], data: Optional[Dict]) -> bytes:
+        """编码HTTP/1.1请求报文"""
+        parts = urlsplit(url)
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8') if data is not None else b''
+        lines = [f"{method} {target} HTTP/1.1".encode('latin-1'),
+                 b"Host: " + self.host_header,
+                 b"Connection: keep-alive",
+                 b"Accept: */*",
+                 b"Content-Length: " + str(len(body)).encode()]
+        if data is not None:
+            lines.append(b"Content-Type: application/json")
+        for name, value in headers.items():
+            if name.lower() not in ('content-type', 'content-length', 'host', 'connection'):
+                lines.append(f"{name}: {value}".encode('utf-8'))
+        return b"\r\n".join(lines) + b"\r\n\r\n" + body
+
+    async def request(self, method, url, headers, data):
+        payload = self._encode(method, url, headers, data)
+        async with self._slots:
+            conn = await self._acquire_connection()
+            status, body = await conn.send(payload)
+        return status, json.loads(body) if status == 200 and body else {}
+
+    async def close(self) -> None:
+        for conn in self._pool:
+            await conn.close()
+        self._pool = []
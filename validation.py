@@ -0,0 +1,204 @@
+import queue
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Any, Optional, Callable, Tuple, List
+
+from metrics import endpoint_name
+
+# 校验函数：合法时返回None，否则返回 (失败类别, 出错位置)
+Checker = Callable[[Any], Optional[Tuple[str, str]]]
+
+ID = (str, int)
+NUMBER = (int, float, str)
+
+# 各端点成功响应的结构，键名以 ? 结尾表示可缺省（或为null）
+# 只描述压测流程实际读取的字段，服务端新增字段不影响校验
+ENDPOINT_SCHEMAS: Dict[str, Any] = {
+    'clientLogin': {
+        'success': bool,
+        'result': {
+            'token': str,
+            'studentInfo': {'id': ID, 'userName': str},
+        },
+    },
+    'isUserHasTask': {
+        'success': bool,
+        'isHaveTask?': bool,
+        'result?': [{
+            'evaluation': {'id': ID, 'createBy': ID, 'taskName': str},
+            'scaleList': [{
+                'id': ID,
+                'scaleName': str,
+                'optionVo': [{
+                    'questionOptionScoreList': [{'contentOptions': str, 'scoring': NUMBER}],
+                }],
+            }],
+        }],
+    },
+    'getResult': {'success': bool},
+    'getReportUserInfo': {'success': bool, 'result': dict},
+}
+
+
+def compile_schema(schema: Any, path: str = '$') -> Checker:
+    """
+    把结构描述编译为校验函数，每个端点只编译一次
+
+    Args:
+        schema: 结构描述。dict表示对象（逐键校验），单元素list表示数组（逐项校验），
+                类型或类型元组表示叶子节点的类型
+        path: 当前节点在响应中的位置，用于报告出错字段
+
+    Returns:
+        Checker: 校验函数
+    """
+    if isinstance(schema, dict):
+        fields = [(key.rstrip('?'), key.endswith('?'), compile_schema(sub, f"{path}.{key.rstrip('?')}"))
+                  for key, sub in schema.items()]
+
+        def check_object(value):
+            if not isinstance(value, dict):
+                return 'wrong_type', path
+            for name, optional, check in fields:
+                item = value.get(name)
+                if item is None:
+                    if optional:
+                        continue
+                    return 'missing_field', f"{path}.{name}"
+                error = check(item)
+                if error:
+                    return error
+            return None
+        return check_object
+
+    if isinstance(schema, list):
+        check_item = compile_schema(schema[0], path + '[]')
+
+        def check_array(value):
+            if not isinstance(value, list):
+                return 'wrong_type', path
+            for item in value:
+                error = check_item(item)
+                if error:
+                    return error
+            return None
+        return check_array
+
+    types = schema if isinstance(schema, tuple) else (schema,)
+
+    def check_leaf(value):
+        return None if isinstance(value, types) else ('wrong_type', path)
+    return check_leaf
+
+
+class ResponseValidator:
+    """
+    响应校验
+
+    按端点把响应结构编译成校验函数，每N个响应抽样校验1个，失败按类别统计：
+    http_status（非200）、empty_body（200但无内容）、business（success为false）、
+    missing_field / wrong_type（结构不符，附出错字段）。
+    开启线程模式时，请求协程只把响应放入队列，校验在后台线程完成，不占用事件循环；
+    受GIL限制校验仍会消耗本进程CPU，高负载时应配合抽样使用
+    """
+
+    def __init__(self, sample_every: int = 1, threaded: bool = False,
+                 schemas: Optional[Dict[str, Any]] = None):
+        """
+        初始化响应校验器
+
+        Args:
+            sample_every: 每N个响应校验1个（按端点分别计数），1表示全部校验
+            threaded: 是否在后台线程中校验
+            schemas: 端点名称 -> 结构描述，默认使用 ENDPOINT_SCHEMAS
+        """
+        self.sample_every = max(1, sample_every)
+        self.checkers: Dict[str, Checker] = {
+            name: compile_schema(schema) for name, schema in (schemas or ENDPOINT_SCHEMAS).items()
+        }
+        self.seen: Counter = Counter()         # 各端点收到的响应数
+        self.checked: Counter = Counter()      # 各端点实际校验的响应数
+        self.failures: Counter = Counter()     # (端点, 类别) -> 失败次数
+        self.examples: Dict[Tuple[str, str], str] = {}  # (端点, 类别) -> 首次失败的说明
+        self.logger = logging.getLogger('ResponseValidator')
+
+        self._queue: Optional[queue.SimpleQueue] = None
+        self._thread: Optional[threading.Thread] = None
+        if threaded:
+            self._queue = queue.SimpleQueue()
+            self._thread = threading.Thread(target=self._worker, name='ResponseValidator', daemon=True)
+            self._thread.start()
+
+    def observe(self, endpoint: str, status: int, data: Dict[str, Any]) -> None:
+        """
+        接收一个响应，按抽样比例决定是否校验
+
+        Args:
+            endpoint: 端点名称或请求路径（路径按 endpoint_name 归一化）
+            status: HTTP状态码
+            data: 解析后的响应数据
+        """
+        name = endpoint_name(endpoint)
+        seen = self.seen[name] = self.seen[name] + 1
+        if seen % self.sample_every:
+            return
+        if self._queue is not None:
+            self._queue.put((name, status, data))
+        else:
+            self._validate(name, status, data)
+
+    def _worker(self) -> None:
+        """后台线程：依次校验队列中的响应，收到None时退出"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self._validate(*item)
+
+    def _validate(self, name: str, status: int, data: Dict[str, Any]) -> None:
+        """校验一个响应并统计结果"""
+        self.checked[name] += 1
+        if status != 200:
+            category, detail = f"http_status:{status}", f"状态码 {status}"
+        elif not data:
+            category, detail = 'empty_body', "响应体为空"
+        elif data.get('success') is False:
+            category, detail = 'business', str(data.get('message', '未知错误'))
+        else:
+            # 同一端点的不同指标名（如 getReportUserInfo#repeat）使用该端点的结构
+            checker = self.checkers.get(name) or self.checkers.get(name.split('#', 1)[0])
+            error = checker(data) if checker else None
+            if error is None:
+                return
+            category = f"{error[0]}:{error[1]}"
+            detail = f"字段 {error[1]} {'缺失' if error[0] == 'missing_field' else '类型不符'}"
+
+        key = (name, category)
+        self.failures[key] += 1
+        if key not in self.examples:
+            self.examples[key] = detail
+            if not category.startswith(('http_status', 'business')):
+                self.logger.warning(f"[{name}] 响应校验失败: {detail}")
+
+    def close(self) -> None:
+        """等待后台线程处理完队列中的响应"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def summary(self) -> List[Tuple[str, int, List[Tuple[str, int, str]]]]:
+        """
+        汇总校验结果
+
+        Returns:
+            List: 每个端点一项 (端点名称, 校验数, [(失败类别, 次数, 示例说明), ...])，失败按次数降序
+        """
+        result = []
+        for name, checked in self.checked.most_common():
+            failures = [(category, count, self.examples[(endpoint, category)])
+                        for (endpoint, category), count in self.failures.most_common()
+                        if endpoint == name]
+            result.append((name, checked, failures))
+        return result
@@ -0,0 +1,35 @@
+from typing import Optional, List, Dict, Any
+
+
+class VirtualUser:
+    """
+    虚拟用户状态记录
+
+    只保存单个学生在测试流程中的状态（登录信息、当前任务、问卷引用），
+    请求逻辑由各用户共享的无状态服务实例完成。使用 __slots__ 避免每个实例创建 __dict__，
+    十万级虚拟用户也能在单个进程内运行
+    """
+
+    __slots__ = ('username', 'password', 'user_id', 'token', 'task_id', 'create_by', 'scale_list')
+
+    def __init__(self, username: str, password: str,
+                 user_id: Optional[str] = None, token: Optional[str] = None):
+        """
+        初始化虚拟用户
+
+        Args:
+            username: 用户名
+            password: 密码
+            user_id: 已知的用户ID（预登录缓存）
+            token: 已知的认证token（预登录缓存）
+        """
+        self.username = username
+        self.password = password
+        self.user_id = user_id                                  # 用户ID，登录成功后设置
+        self.token = token                                      # 认证token，登录成功后设置
+        self.task_id: Optional[str] = None                      # 当前任务ID
+        self.create_by: Optional[str] = None                    # 任务创建者ID
+        self.scale_list: List[Dict[str, Any]] = []              # 问卷列表（同一任务的用户共享同一份）
+
+    def __repr__(self) -> str:
+        return f"VirtualUser({self.username!r})"